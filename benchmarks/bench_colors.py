@@ -0,0 +1,101 @@
+"""Construction time and memory of Color/Colors against the QObject based classes.
+
+Run from the repository root:
+
+    python benchmarks/bench_colors.py
+
+The memory numbers are the Python heap measured by tracemalloc, so they leave
+out the C++ side of the old QObject based Colors.
+"""
+import gc
+import os
+import sys
+import timeit
+import tracemalloc
+from typing import Any, Callable, List
+
+from PyQt5 import QtCore
+from PyQt5.QtCore import QObject
+from PyQt5.QtGui import QColor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+from pytabtoolbar.style.toolbarstyles import Color, Colors  # noqa: E402
+
+ITERATIONS = 20000
+INSTANCES = 5000
+
+
+class LegacyColor:
+    def __init__(self, coefficient: float, value: QColor):
+        self.coefficient: float = coefficient
+        if isinstance(value, QtCore.Qt.GlobalColor):
+            self.value = QColor(value)
+        else:
+            self.value = value
+
+
+class LegacyColors(QObject):
+    def __init__(self, data: Any):
+        self._list: List[LegacyColor] = []
+        if isinstance(data, QColor):
+            self._list.append(LegacyColor(1.0, data))
+        elif isinstance(data, list):
+            self._list = list(data)
+        super(LegacyColors, self).__init__()
+
+
+def _gradient(color_class: type, colors_class: type) -> Callable[[], Any]:
+    def create():
+        return colors_class(
+            [
+                color_class(0.0, QColor(0xE5, 0xE5, 0xE5)),
+                color_class(0.1, QColor(0xBF, 0xBF, 0xBF)),
+                color_class(0.7, QColor(0x30, 0x8C, 0xC6)),
+                color_class(1.0, QColor(0xFF, 0xFF, 0xFF)),
+            ]
+        )
+
+    return create
+
+
+def _single(colors_class: type) -> Callable[[], Any]:
+    def create():
+        return colors_class(QColor(0x30, 0x8C, 0xC6))
+
+    return create
+
+
+def _measure(create: Callable[[], Any]):
+    seconds = timeit.timeit(create, number=ITERATIONS) / ITERATIONS
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    instances = [create() for _ in range(INSTANCES)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del instances
+    return seconds * 1e6, size / INSTANCES
+
+
+def main():
+    cases = [
+        (
+            "4-stop gradient",
+            _gradient(LegacyColor, LegacyColors),
+            _gradient(Color, Colors),
+        ),
+        ("1-stop color", _single(LegacyColors), _single(Colors)),
+    ]
+    for name, legacy, current in cases:
+        legacy_time, legacy_size = _measure(legacy)
+        current_time, current_size = _measure(current)
+        print(
+            "{:16} {:6.2f} us / {:5.0f} B  ->  {:6.2f} us / {:5.0f} B".format(
+                name, legacy_time, legacy_size, current_time, current_size
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,22 @@
 from .group import Group
-from .page import Page
+from .page import Page, PageStats
 from .subgroup import ActionParams, Align, SubGroup
-from .tabtoolbar import TabToolbar
+from .tabtoolbar import RestyleStats, TabToolbar, ToolbarMetric
 from .style import (
     STYLE_COOL,
     STYLE_THRESHOLD,
     STYLE_VIENNA,
     STYLE_WHITEMERCY,
     StyleParams,
+    StyleSnapshot,
+    ThemeRules,
     get_stylesheet,
     get_styles,
     get_defaultstyle,
+    regenerate_styles,
     register_style,
+    set_stylesheet_cachedir,
+    set_stylesheet_minify,
 )
 from ._builder import Builder
 
@@ -22,14 +27,22 @@ __all__ = [
     "STYLE_WHITEMERCY",
     "ActionParams",
     "Align",
+    "RestyleStats",
     "TabToolbar",
+    "ToolbarMetric",
     "Group",
     "SubGroup",
     "Page",
+    "PageStats",
     "Builder",
     "get_stylesheet",
     "get_styles",
     "get_defaultstyle",
     "register_style",
+    "regenerate_styles",
+    "set_stylesheet_cachedir",
+    "set_stylesheet_minify",
     "StyleParams",
+    "StyleSnapshot",
+    "ThemeRules",
 ]
@@ -5,6 +5,7 @@ from typing import Any, Dict, List
 from PyQt5 import QtCore
 from PyQt5.QtWidgets import QAction, QMenu, QToolButton, QWidget
 
+from .page import Page
 from .subgroup import ActionParams, Align
 from .tabtoolbar import TabToolbar
 
@@ -16,8 +17,12 @@ class Builder(QtCore.QObject):
         self.guiWidgets: Dict[str, QWidget] = {}
         self.customWidgetCreators: Dict[str, QWidget] = {}
         self.defaultstyle = defaultstyle
+        self.lazyPages: Dict[str, Page] = {}
 
     def __getitem__(self, widget_name):
+        if widget_name in self.lazyPages:
+            # Widgets of a deferred page exist once the page is built.
+            self.lazyPages.pop(widget_name).materialize()
         if len(self.guiWidgets) > 0:
             if widget_name in self.guiWidgets:
                 return self.guiWidgets[widget_name]
@@ -61,86 +66,110 @@ class Builder(QtCore.QObject):
         group_rowcount: int = self.read_json(config, "groupRowCount")
         has_specialtab: bool = self.read_json(config, "specialTab")
         tt = TabToolbar(self.parent, self.defaultstyle, group_height, group_rowcount)
-        corner_actions: List = self.read_json(config, "cornerActions", {})
-        for corner_action in corner_actions:
-            tt.add_corneraction(self.actionsMap[corner_action])
-
-        menuslist: List = self.read_json(config, "menus", {})
-        for menuobject in menuslist:
-            menu: QMenu = QMenu(self.parent)
-            menu.setObjectName(self.read_json(menuobject, "name"))
-            self.menusMap[menu.objectName()] = menu
-            self.guiWidgets[menu.objectName()] = menu
-            menuactions: List = self.read_json(menuobject, "actions", {})
-            for action_name in menuactions:
-                if action_name == "separator":
-                    menu.addSeparator()
-                else:
-                    menu.addActions({self.actionsMap[action_name]})
-        tabs = self.read_json(config, "tabs", {})
-        for tab in tabs:
-            page_displayname = self.read_json(tab, "displayName")
-            page_name = self.read_json(tab, "name")
-            page = tt.add_page(page_displayname)
-            self.guiWidgets[page_name] = page
-            groups = self.read_json(tab, "groups", {})
-            for group_object in groups:
-                group_displayname = self.read_json(group_object, "displayName")
-                group_name = self.read_json(group_object, "name")
-                group = page.add_group(group_displayname)
-                self.guiWidgets[group_name] = group
-                content = self.read_json(group_object, "content", {})
-                for item in content:
-                    # defaultTypes = {"action", "subgroup", "seperator"}
-                    item_type = self.read_json(item, "itemType")
-                    if item_type == "action":
-                        params = self.create_actionparams(tt, item)
-                        if params:
-                            group.add_action(params.type, params.action, params.menu)
-                    elif item_type == "subgroup":
-                        align: Align = Align.Yes
-                        aligned = self.read_json(item, "aligned", None)
-                        if not aligned:
-                            align = Align.No
-                        subgroup = group.add_subgroup(align)
-                        subgroup_name = self.read_json(item, "name")
-                        self.guiWidgets[subgroup_name] = subgroup
-
-                        subgroup_content = self.read_json(item, "content", {})
-                        for subgroup_item in subgroup_content:
-                            subgroup_itemtype = self.read_json(
-                                subgroup_item, "itemType"
-                            )
-                            if subgroup_itemtype == "action":
-                                params: ActionParams = self.create_actionparams(
-                                    tt, subgroup_item
-                                )
-                                subgroup.add_action(
-                                    params.type, params.action, params.menu
-                                )
-                            elif subgroup_itemtype == "horizontalActions":
-                                h_actions = []
-                                h_actionsarray = subgroup_item["actions"]
-
-                                for h_action in h_actionsarray:
-                                    h_actions.append(
-                                        self.create_actionparams(tt, h_action)
-                                    )
-                                subgroup.add_hbuttons(h_actions)
-                            else:
-                                w = self.create_customwidget(
-                                    tt, subgroup_itemtype, subgroup_item
-                                )
-
-                                subgroup.add_widget(w)
-                    elif item_type == "separator":
-                        group.add_separator()
+        with tt.batch_update():
+            corner_actions: List = self.read_json(config, "cornerActions", {})
+            for corner_action in corner_actions:
+                tt.add_corneraction(self.actionsMap[corner_action])
+
+            menuslist: List = self.read_json(config, "menus", {})
+            for menuobject in menuslist:
+                menu: QMenu = QMenu(self.parent)
+                menu.setObjectName(self.read_json(menuobject, "name"))
+                self.menusMap[menu.objectName()] = menu
+                self.guiWidgets[menu.objectName()] = menu
+                menuactions: List = self.read_json(menuobject, "actions", {})
+                for action_name in menuactions:
+                    if action_name == "separator":
+                        menu.addSeparator()
                     else:
-                        w = self.create_customwidget(tt, item_type, item)
-                        group.add_widget(w)
-        tt.set_specialtabenabled(has_specialtab)
+                        menu.addActions({self.actionsMap[action_name]})
+            tabs = self.read_json(config, "tabs", {})
+            for tab in tabs:
+                page_displayname = self.read_json(tab, "displayName")
+                page_name = self.read_json(tab, "name")
+                if self.read_json(tab, "lazy", False):
+                    page = tt.add_page(
+                        page_displayname,
+                        lambda page, tab=tab: self.build_page(tt, page, tab),
+                    )
+                    self.register_lazypage(page, tab)
+                    page.Unloaded.connect(
+                        lambda page=page, tab=tab: self.register_lazypage(page, tab)
+                    )
+                else:
+                    page = tt.add_page(page_displayname)
+                    self.build_page(tt, page, tab)
+                self.guiWidgets[page_name] = page
+            tt.set_specialtabenabled(has_specialtab)
         return tt
 
+    def build_page(self, tt: TabToolbar, page: Page, tab: Any):
+        groups = self.read_json(tab, "groups", {})
+        for group_object in groups:
+            group_displayname = self.read_json(group_object, "displayName")
+            group_name = self.read_json(group_object, "name")
+            group = page.add_group(group_displayname)
+            self.guiWidgets[group_name] = group
+            content = self.read_json(group_object, "content", {})
+            for item in content:
+                # defaultTypes = {"action", "subgroup", "seperator"}
+                item_type = self.read_json(item, "itemType")
+                if item_type == "action":
+                    params = self.create_actionparams(tt, item)
+                    if params:
+                        group.add_action(params.type, params.action, params.menu)
+                elif item_type == "subgroup":
+                    align: Align = Align.Yes
+                    aligned = self.read_json(item, "aligned", None)
+                    if not aligned:
+                        align = Align.No
+                    subgroup = group.add_subgroup(align)
+                    subgroup_name = self.read_json(item, "name")
+                    self.guiWidgets[subgroup_name] = subgroup
+
+                    subgroup_content = self.read_json(item, "content", {})
+                    for subgroup_item in subgroup_content:
+                        subgroup_itemtype = self.read_json(subgroup_item, "itemType")
+                        if subgroup_itemtype == "action":
+                            params: ActionParams = self.create_actionparams(
+                                tt, subgroup_item
+                            )
+                            subgroup.add_action(params.type, params.action, params.menu)
+                        elif subgroup_itemtype == "horizontalActions":
+                            h_actions = []
+                            h_actionsarray = subgroup_item["actions"]
+
+                            for h_action in h_actionsarray:
+                                h_actions.append(self.create_actionparams(tt, h_action))
+                            subgroup.add_hbuttons(h_actions)
+                        else:
+                            w = self.create_customwidget(
+                                tt, subgroup_itemtype, subgroup_item
+                            )
+
+                            subgroup.add_widget(w)
+                elif item_type == "separator":
+                    group.add_separator()
+                else:
+                    w = self.create_customwidget(tt, item_type, item)
+                    group.add_widget(w)
+
+    def register_lazypage(self, page: Page, tab: Any):
+        # The widgets of an unloaded page are gone until it is rebuilt.
+        for name in self.widgetnames(tab):
+            self.guiWidgets.pop(name, None)
+            self.lazyPages[name] = page
+
+    def widgetnames(self, obj: Any) -> List[str]:
+        """The names of the widgets declared in `obj` and its content."""
+        names = []
+        for key in ("groups", "content"):
+            for item in self.read_json(obj, key, {}):
+                if "name" in item and item.get("itemType") != "action":
+                    names.append(item["name"])
+                names.extend(self.widgetnames(item))
+        return names
+
     def create_customwidget(self, tt: TabToolbar, name: str, item: Any) -> QWidget:
 
         if name not in self.customWidgetCreators:
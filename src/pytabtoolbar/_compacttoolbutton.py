@@ -1,131 +1,225 @@
-from typing import Union
+from typing import Final, Optional, Tuple, Union
 
 from PyQt5 import QtCore, QtGui
 from PyQt5.QtWidgets import (
     QAction,
-    QBoxLayout,
-    QFrame,
     QMenu,
     QSizePolicy,
     QStyle,
     QStyleOptionToolButton,
     QStylePainter,
     QToolButton,
-    QVBoxLayout,
     QWidget,
 )
 
-from pytabtoolbar.style import get_pixelmetric, get_scalefactor, TTToolButtonStyle
+import pytabtoolbar.tabtoolbar as tabtoolbar
 
+_MIN_TEXTHEIGHT = 25
 
-class _CompactToolButton(QFrame):
-    def __init__(self, action: QAction, menu: QMenu, parent):
+# QFontMetrics.horizontalAdvance() needs Qt 5.11, width() is deprecated since.
+_HAS_HORIZONTALADVANCE: Final[bool] = tuple(
+    int(part) for part in QtCore.QT_VERSION_STR.split(".")[:2]
+) >= (5, 11)
+
+
+class _CompactToolButton(QToolButton):
+    """Split button with the action's icon on top and its text below.
+
+    Clicking the icon triggers the action, clicking the text opens the menu.
+    Both halves and the frame shared by them while hovered are painted by
+    this single widget. Their size hints and rects are cached until the
+    size, font, icon size, label or style of the button changes.
+    """
+
+    def __init__(self, action: QAction, menu: QMenu, parent: QWidget):
         super(_CompactToolButton, self).__init__(parent)
-        self.overlay = _TTOverlayToolButton(self)
-
-        iconsize = int(get_pixelmetric(QStyle.PM_LargeIconSize) * get_scalefactor(self))
-        self.upButton = QToolButton(self)
-        self.upButton.setProperty("TTInternal", QtCore.QVariant(True))
-        self.upButton.setAutoRaise(True)
-        self.upButton.setDefaultAction(action)
-        self.upButton.setIconSize(QtCore.QSize(iconsize, iconsize))
-        self.upButton.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Maximum)
-        self.upButton.setStyle(TTToolButtonStyle(self))
-        self.upButton.setMaximumHeight(iconsize + 5)
-
-        self.vlayout = QVBoxLayout(self)
-        self.vlayout.setContentsMargins(0, 0, 0, 0)
-        self.vlayout.setSpacing(0)
-        self.vlayout.setDirection(QBoxLayout.TopToBottom)
-
-        self.upButton.setToolButtonStyle(QtCore.Qt.ToolButtonIconOnly)
-        self.upButton.setPopupMode(QToolButton.DelayedPopup)
-        self.vlayout.addWidget(self.upButton)
-
-        self.downButton = QToolButton(self)
-        self.downButton.setProperty("TTInternal", QtCore.QVariant(True))
-        self.downButton.setAutoRaise(True)
-        self.downButton.setToolButtonStyle(QtCore.Qt.ToolButtonTextOnly)
-        self.downButton.setPopupMode(QToolButton.InstantPopup)
-        self.downButton.setMinimumHeight(25)
-        self.downButton.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Minimum)
+        self.setProperty("TTInternal", QtCore.QVariant(True))
+        self.setAutoRaise(True)
+        self.setMouseTracking(True)
+        self.setToolButtonStyle(QtCore.Qt.ToolButtonIconOnly)
+        self.setPopupMode(QToolButton.DelayedPopup)
+        self.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Preferred)
+        self.label = ""
+        self._hints: Optional[Tuple[QtCore.QSize, QtCore.QSize]] = None
+        self._half_rects: Optional[Tuple[QtCore.QRect, QtCore.QRect]] = None
         if action:
-            self.downButton.setText(action.text())
-            self.downButton.setToolTip(action.toolTip())
-        self.downButton.setStyle(TTToolButtonStyle(self))
+            self.setDefaultAction(action)
+            self.label = action.text()
+            self.setToolTip(action.toolTip())
+        tabtoolbar.scale_icon(self, QStyle.PM_LargeIconSize)
+        tabtoolbar.apply_toolbuttonstyle(self)
 
+        self.compact_menu: Union[QMenu, None] = menu
         if menu:
-            self.downButton.setMenu(menu)
-            menu.aboutToHide.connect(lambda: self.set_hover(False))
-
-        self.vlayout.addWidget(self.downButton)
-        self.setLayout(self.vlayout)
-
-        self.hover = _TTHover(self, self.upButton, self.downButton)
-        self.upButton.installEventFilter(self.hover)
-        self.downButton.installEventFilter(self.hover)
+            # A bound slot, unlike a lambda, is disconnected when the button
+            # is deleted, e.g. when its page is unloaded. The menu lives on.
+            menu.aboutToHide.connect(self._menu_hidden)
+        self.hover = False
+        self._hover_up: Union[bool, None] = None
 
     def set_hover(self, hover: bool):
-        self.overlay.paint = hover
+        self.hover = hover
         self.update()
 
+    @QtCore.pyqtSlot()
+    def _menu_hidden(self):
+        self.set_hover(False)
 
-class _TTOverlayToolButton(QToolButton):
-    def __init__(self, parent: QWidget):
-        super(_TTOverlayToolButton, self).__init__(parent)
-        self.setAttribute(QtCore.Qt.WA_NoSystemBackground)
-        self.setAttribute(QtCore.Qt.WA_TranslucentBackground)
-        self.setAttribute(QtCore.Qt.WA_TransparentForMouseEvents)
-        parent.installEventFilter(self)
-        self.lower()
-        self.paint = False
-
-    def eventFilter(
-        self, obj: QtCore.QObject, ev: Union[QtGui.QResizeEvent, QtCore.QEvent]
-    ):
-        if obj == self.parent():
-            if ev.type() == QtCore.QEvent.Resize:
-                self.resize(ev.size())  # type: ignore
-            elif ev.type == QtCore.QEvent.ChildAdded:
-                self.lower()
-        return super(_TTOverlayToolButton, self).eventFilter(obj, ev)
-
-    def paintEvent(self, event: QtGui.QPaintEvent) -> None:
-        if not self.paint:
+    def _half_option(self, up: bool) -> QStyleOptionToolButton:
+        opt = QStyleOptionToolButton()
+        self.initStyleOption(opt)
+        if up:
+            if self._hover_up is not True:
+                opt.state &= ~QStyle.State_MouseOver  # type: ignore
+        else:
+            opt.state &= ~(QStyle.State_MouseOver | QStyle.State_Sunken)  # type: ignore
+            if self._hover_up is False:
+                opt.state |= QStyle.State_MouseOver  # type: ignore
+            opt.activeSubControls = QStyle.SC_None  # type: ignore
+            opt.features = QStyleOptionToolButton.None_  # type: ignore
+            if self.compact_menu:
+                opt.features = QStyleOptionToolButton.HasMenu  # type: ignore
+            opt.toolButtonStyle = QtCore.Qt.ToolButtonTextOnly  # type: ignore
+            opt.text = self.label  # type: ignore
+            opt.icon = QtGui.QIcon()  # type: ignore
+        return opt
+
+    def _half_hint(self, up: bool) -> QtCore.QSize:
+        opt = self._half_option(up)
+        if up:
+            size = QtCore.QSize(self.iconSize())
+        else:
+            fm = self.fontMetrics()
+            size = fm.size(QtCore.Qt.TextShowMnemonic, self.label)
+            if _HAS_HORIZONTALADVANCE:
+                space = fm.horizontalAdvance(" ")
+            else:
+                space = fm.width(" ")
+            size.setWidth(size.width() + space * 2)
+        opt.rect.setSize(size)  # type: ignore
+        return self.style().sizeFromContents(QStyle.CT_ToolButton, opt, size, self)
+
+    def _upheight(self, up_hint: QtCore.QSize) -> int:
+        return min(up_hint.height(), self.iconSize().height() + 5)
+
+    def _half_hints(self) -> Tuple[QtCore.QSize, QtCore.QSize]:
+        if self._hints is None:
+            self._hints = (self._half_hint(True), self._half_hint(False))
+        return self._hints
+
+    def _halves(self) -> Tuple[QtCore.QRect, QtCore.QRect]:
+        if self._half_rects is None:
+            rect = self.rect()
+            up_height = self._upheight(self._half_hints()[0])
+            up = QtCore.QRect(rect.x(), rect.y(), rect.width(), up_height)
+            down = QtCore.QRect(rect)
+            down.setTop(up.bottom() + 1)
+            self._half_rects = (up, down)
+        return self._half_rects
+
+    def _invalidate_halves(self):
+        self._hints = None
+        self._half_rects = None
+        self.updateGeometry()
+
+    def set_label(self, label: str):
+        if label != self.label:
+            self.label = label
+            self._invalidate_halves()
+            self.update()
+
+    def setIconSize(self, size: QtCore.QSize):
+        super(_CompactToolButton, self).setIconSize(size)
+        self._invalidate_halves()
+
+    def sizeHint(self) -> QtCore.QSize:
+        up, down = self._half_hints()
+        return QtCore.QSize(
+            max(up.width(), down.width()),
+            self._upheight(up) + max(down.height(), _MIN_TEXTHEIGHT),
+        )
+
+    def minimumSizeHint(self) -> QtCore.QSize:
+        size = self.sizeHint()
+        size.setHeight(self._upheight(self._half_hints()[0]) + _MIN_TEXTHEIGHT)
+        return size
+
+    def hitButton(self, pos: QtCore.QPoint) -> bool:
+        return self._halves()[0].contains(pos)
+
+    def _track_hover(self, pos: Union[QtCore.QPoint, None]):
+        hover_up = None if pos is None else self._halves()[0].contains(pos)
+        if hover_up != self._hover_up:
+            self._hover_up = hover_up
+            self.update()
+
+    def enterEvent(self, event: QtCore.QEvent):
+        self.hover = self.isEnabled()
+        self._track_hover(self.mapFromGlobal(QtGui.QCursor.pos()))
+        super(_CompactToolButton, self).enterEvent(event)
+
+    def leaveEvent(self, event: QtCore.QEvent):
+        self.hover = False
+        self._track_hover(None)
+        super(_CompactToolButton, self).leaveEvent(event)
+
+    def mouseMoveEvent(self, event: QtGui.QMouseEvent):
+        self._track_hover(event.pos())
+        super(_CompactToolButton, self).mouseMoveEvent(event)
+
+    def mousePressEvent(self, event: QtGui.QMouseEvent):
+        if event.button() == QtCore.Qt.LeftButton and not self.hitButton(event.pos()):
+            if self.compact_menu:
+                self._popup_menu()
+            event.accept()
             return
+        super(_CompactToolButton, self).mousePressEvent(event)
 
+    def _popup_menu(self):
+        menu = self.compact_menu
+        pos = self.mapToGlobal(self.rect().bottomLeft())
+        if self.layoutDirection() == QtCore.Qt.RightToLeft:
+            pos.setX(pos.x() + self.width() - menu.sizeHint().width())  # type: ignore
+        self.update()
+        menu.exec_(pos)  # type: ignore
+        self._track_hover(
+            self.mapFromGlobal(QtGui.QCursor.pos()) if self.underMouse() else None
+        )
+
+    def changeEvent(self, event: QtCore.QEvent):
+        if event.type() == QtCore.QEvent.EnabledChange:
+            self.hover = self.isEnabled() and self.underMouse()
+        elif event.type() in (QtCore.QEvent.FontChange, QtCore.QEvent.StyleChange):
+            self._invalidate_halves()
+        super(_CompactToolButton, self).changeEvent(event)
+
+    def resizeEvent(self, event: QtGui.QResizeEvent):
+        self._half_rects = None
+        super(_CompactToolButton, self).resizeEvent(event)
+
+    def actionEvent(self, event: QtGui.QActionEvent):
+        super(_CompactToolButton, self).actionEvent(event)
+        if (
+            event.type() == QtCore.QEvent.ActionChanged
+            and event.action() is self.defaultAction()
+        ):
+            self.set_label(event.action().text())
+
+    def paintEvent(self, event: QtGui.QPaintEvent):
         sp = QStylePainter(self)
-        opt = QStyleOptionToolButton()
-        self.initStyleOption(opt)
-        opt.state |= (
-            QStyle.State_MouseOver | QStyle.State_AutoRaise | QStyle.State_Raised
-        )  # type: ignore
-        opt.activeSubControls |= QStyle.SC_ToolButton  # type: ignore
-        sp.drawComplexControl(QStyle.CC_ToolButton, opt)
-
-
-class _TTHover(QtCore.QObject):
-    def __init__(self, parent: _CompactToolButton, up: QToolButton, down: QToolButton):
-        super(_TTHover, self).__init__(parent)
-        self.toolButton: _CompactToolButton = parent
-        self.upButton: QToolButton = up
-        self.downButton: QToolButton = down
-
-    def eventFilter(self, watched: QtCore.QObject, event: QtCore.QEvent) -> bool:
-        if event.type() == QtCore.QEvent.HoverLeave:
-            self.toolButton.set_hover(False)
-        elif event.type() == QtCore.QEvent.HoverEnter:
-            if watched == self.upButton or watched == self.downButton:
-                self.toolButton.set_hover(self.upButton.isEnabled())
-
-        if watched == self.upButton:
-            if event.type() == QtCore.QEvent.Hide:
-                self.downButton.hide()
-            elif event.type() == QtCore.QEvent.Show:
-                self.downButton.show()
-            elif event.type() == QtCore.QEvent.EnabledChange:
-                self.downButton.setEnabled(self.upButton.isEnabled())
-                self.toolButton.set_hover(
-                    self.upButton.isEnabled() and self.upButton.underMouse()
-                )
-        return super(_TTHover, self).eventFilter(watched, event)
+        if self.hover:
+            # The frame around both halves, painted like an empty button.
+            opt = QStyleOptionToolButton()
+            opt.initFrom(self)
+            opt.state |= (  # type: ignore
+                QStyle.State_MouseOver | QStyle.State_AutoRaise | QStyle.State_Raised
+            )
+            opt.subControls = QStyle.SC_ToolButton  # type: ignore
+            opt.activeSubControls = QStyle.SC_ToolButton  # type: ignore
+            sp.drawComplexControl(QStyle.CC_ToolButton, opt)
+
+        up, down = self._halves()
+        for rect, is_up in ((up, True), (down, False)):
+            opt = self._half_option(is_up)
+            opt.rect = rect
+            sp.drawComplexControl(QStyle.CC_ToolButton, opt)
@@ -14,7 +14,6 @@ from PyQt5.QtWidgets import (
 )
 
 from ._compacttoolbutton import _CompactToolButton
-import pytabtoolbar.style as style
 import pytabtoolbar.subgroup as subgroup
 
 # from .style import TTToolButtonStyle, get_pixelmetric, get_scalefactor
@@ -70,12 +69,23 @@ class Group(QFrame):
         if not parent_tabtoolbar:
             raise Exception("Could not find Parent Tabtoolbar")
 
-        group_maxheight = parent_tabtoolbar.group_maxheight
-        rowcount = parent_tabtoolbar.rowcount()
-        height = group_maxheight + self.group_name.height() + rowcount - 1
+        for child in self.findChildren(QFrame):
+            parent_tabtoolbar.polish_scoped(child)
+
+        self._adjust_height(parent_tabtoolbar)
+        parent_tabtoolbar.HeightChanged.connect(self._toolbar_heightchanged)
+
+    def _adjust_height(self, parent_tabtoolbar: "tabtoolbar.TabToolbar"):
+        height = parent_tabtoolbar.group_height()
         self.setMinimumHeight(height)
         self.setMaximumHeight(height)
 
+    @QtCore.pyqtSlot()
+    def _toolbar_heightchanged(self):
+        parent_tabtoolbar = tabtoolbar.find_tabtoolbar(self)
+        if parent_tabtoolbar:
+            self._adjust_height(parent_tabtoolbar)
+
     def add_subgroup(self, align: subgroup.Align) -> subgroup.SubGroup:
         sgrp = subgroup.SubGroup(align, self)
         self.inner_layout.addWidget(sgrp)
@@ -92,7 +102,11 @@ class Group(QFrame):
         return separator
 
     def add_separator(self):
-        self.inner_layout.addWidget(self.create_separator())
+        separator = self.create_separator()
+        parent_tabtoolbar = tabtoolbar.find_tabtoolbar(self)
+        if parent_tabtoolbar:
+            parent_tabtoolbar.polish_scoped(separator)
+        self.inner_layout.addWidget(separator)
 
     def add_action(
         self, type: QToolButton.ToolButtonPopupMode, action: QAction, menu: QMenu
@@ -100,20 +114,15 @@ class Group(QFrame):
         if type == QToolButton.MenuButtonPopup:
             self.inner_layout.addWidget(_CompactToolButton(action, menu, self))
         else:
-            icon_size = int(
-                style.get_pixelmetric(QStyle.PM_LargeIconSize)
-                * style.get_scalefactor(self)
-            )
-
             btn = QToolButton(self)
             btn.setProperty("TTInternal", QtCore.QVariant(True))
             btn.setAutoRaise(True)
             btn.setDefaultAction(action)
-            btn.setIconSize(QtCore.QSize(icon_size, icon_size))
+            tabtoolbar.scale_icon(btn, QStyle.PM_LargeIconSize)
             btn.setSizePolicy(QSizePolicy.Maximum, QSizePolicy.Preferred)
             btn.setToolButtonStyle(QtCore.Qt.ToolButtonTextUnderIcon)
             btn.setPopupMode(type)
-            btn.setStyle(style.TTToolButtonStyle(self.inner_layout))
+            tabtoolbar.apply_toolbuttonstyle(btn)
             if menu:
                 btn.setMenu(menu)
             self.inner_layout.addWidget(btn)
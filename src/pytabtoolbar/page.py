@@ -1,39 +1,117 @@
+from dataclasses import dataclass
+from typing import Callable, Optional
+
 from PyQt5 import QtCore
 from PyQt5.QtGui import QWheelEvent
 from PyQt5.QtWidgets import (
     QFrame,
     QHBoxLayout,
     QScrollArea,
+    QScroller,
     QSizePolicy,
     QSpacerItem,
     QWidget,
 )
 
 import pytabtoolbar.group as group
-import pytabtoolbar.tabtoolbar as tabtoolbar
+
+
+@dataclass
+class PageStats:
+    """The live widgets of a page and how often it was built and unloaded."""
+
+    name: str
+    widgets: int = 0
+    materialized: bool = False
+    builds: int = 0
+    unloads: int = 0
 
 
 class TTScroller(QtCore.QObject):
-    def __init__(self, parent: QtCore.QObject):
-        super(TTScroller, self).__init__(parent)
+    """Scrolls a page horizontally with the mouse wheel or a touchpad."""
+
+    def __init__(self, scroll_area: QScrollArea):
+        super(TTScroller, self).__init__(scroll_area)
+        self.scroll_area = scroll_area
+        self._scrollbar = scroll_area.horizontalScrollBar()
+        self._remainder = 0.0
+        self._target = 0
+        self._animation = QtCore.QPropertyAnimation(self._scrollbar, b"value", self)
+        self._animation.setEasingCurve(QtCore.QEasingCurve.OutCubic)
+        self._animated = False
+        self._kinetic = False
+        scroll_area.installEventFilter(self)
+        scroll_area.viewport().installEventFilter(self)
+
+    def set_animated(self, enabled: bool, duration: int = 150):
+        """Animates the scrolling of wheel events over `duration` ms."""
+        self._animated = enabled
+        self._animation.setDuration(duration)
+        if not enabled:
+            self._animation.stop()
+
+    def set_kinetic(self, enabled: bool):
+        """Lets the page be flicked with touch gestures."""
+        if enabled == self._kinetic:
+            return
+        self._kinetic = enabled
+        viewport = self.scroll_area.viewport()
+        if enabled:
+            QScroller.grabGesture(viewport, QScroller.TouchGesture)
+        else:
+            QScroller.ungrabGesture(viewport)
 
     def eventFilter(self, watched: QtCore.QObject, event: QtCore.QEvent) -> bool:
         if event.type() == QtCore.QEvent.Wheel:
-            scroll = QScrollArea(watched)
-            wheel = QWheelEvent(event)
-            scrollbar = scroll.horizontalScrollBar()
-            scrollbar.setValue(int(scrollbar.value() - wheel.angleDelta().y() / 5))
+            self.scroll(event)  # type: ignore[arg-type]
             return True
         return super(TTScroller, self).eventFilter(watched, event)
 
+    def scroll(self, event: QWheelEvent):
+        pixels = event.pixelDelta()
+        if pixels.isNull():
+            angle = event.angleDelta()
+            delta = (angle.y() or angle.x()) / 5
+        else:
+            delta = pixels.y() or pixels.x()
+        self._remainder += delta
+        step = int(self._remainder)
+        if not step:
+            return
+        self._remainder -= step
+        scrollbar = self._scrollbar
+        if not self._animated:
+            scrollbar.setValue(scrollbar.value() - step)
+            return
+        if self._animation.state() != QtCore.QAbstractAnimation.Running:
+            self._target = scrollbar.value()
+        self._target = max(
+            scrollbar.minimum(), min(scrollbar.maximum(), self._target - step)
+        )
+        self._animation.stop()
+        self._animation.setStartValue(scrollbar.value())
+        self._animation.setEndValue(self._target)
+        self._animation.start()
+
 
 class Page(QWidget):
+    """A tab of the toolbar, its groups are added by `builder` when it is deferred."""
+
     Hiding = QtCore.pyqtSignal(int)
     Showing = QtCore.pyqtSignal(int)
-
-    def __init__(self, index: int, page_name: str, parent: QWidget = None):
+    Materialized = QtCore.pyqtSignal()
+    Unloaded = QtCore.pyqtSignal()
+
+    def __init__(
+        self,
+        index: int,
+        page_name: str,
+        parent: QWidget = None,
+        builder: Optional[Callable[["Page"], None]] = None,
+    ):
         super(Page, self).__init__(parent)
 
+        # Stable id of the page, its position among all pages of the toolbar.
         self.myIndex: int = index
         self.setObjectName(page_name)
         self.setSizePolicy(QSizePolicy.Maximum, QSizePolicy.MinimumExpanding)
@@ -44,6 +122,24 @@ class Page(QWidget):
         self.hboxlayout.setSpacing(0)
         self.setLayout(self.hboxlayout)
 
+        self._builder = builder
+        self._materialized = False
+        self._builds = 0
+        self._unloads = 0
+        self._widget_count: Optional[int] = 0
+        if builder is None:
+            self.materialize()
+
+    def is_materialized(self) -> bool:
+        return self._materialized
+
+    def materialize(self):
+        """Creates the widgets of a deferred page and runs its builder."""
+        if self._materialized:
+            return
+        self._materialized = True
+        self._builds += 1
+
         scroll_area = QScrollArea(self)
         scroll_area.setHorizontalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
         scroll_area.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
@@ -53,7 +149,7 @@ class Page(QWidget):
         scroll_area.setFrameShadow(QFrame.Plain)
         scroll_area.setLineWidth(0)
         scroll_area.setWidgetResizable(True)
-        scroll_area.installEventFilter(TTScroller(scroll_area))
+        self.scroller = TTScroller(scroll_area)
 
         self.inner_area = QFrame()
         self.inner_area.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Ignored)
@@ -61,6 +157,7 @@ class Page(QWidget):
         self.inner_area.setContentsMargins(0, 0, 0, 0)
         self.inner_area.setFrameShape(QFrame.Box)
         self.inner_area.setLineWidth(0)
+        self.inner_area.installEventFilter(self)
 
         self.innerLayout = QHBoxLayout(self.inner_area)
         self.innerLayout.setContentsMargins(0, 0, 0, 0)
@@ -71,15 +168,62 @@ class Page(QWidget):
         self.innerLayout.addItem(spacer)
         scroll_area.setWidget(self.inner_area)
         self.hboxlayout.addWidget(scroll_area)
+        self.scroll_area = scroll_area
+        self._widget_count = None
+        self.Materialized.emit()
+
+        if self._builder is not None:
+            self._builder(self)
+
+    def is_rebuildable(self) -> bool:
+        return self._builder is not None
+
+    def unload(self) -> bool:
+        """Deletes the widgets of a page that its builder can rebuild.
+
+        The page is materialized again the next time it is needed. Returns
+        whether the page was unloaded.
+        """
+        if not self._materialized or self._builder is None:
+            return False
+        self._materialized = False
+        self._unloads += 1
+        scroll_area = self.scroll_area
+        self.hboxlayout.removeWidget(scroll_area)
+        scroll_area.hide()
+        scroll_area.setParent(None)  # type: ignore[call-overload]
+        scroll_area.deleteLater()
+        del self.scroll_area, self.scroller, self.inner_area, self.innerLayout
+        self._widget_count = 0
+        self.Unloaded.emit()
+        return True
+
+    def eventFilter(self, watched: QtCore.QObject, event: QtCore.QEvent) -> bool:
+        if event.type() == QtCore.QEvent.LayoutRequest:
+            # Posted to the inner frame when widgets are added or removed.
+            self._widget_count = None
+        return super(Page, self).eventFilter(watched, event)
+
+    def widget_count(self) -> int:
+        """The number of live widgets on the page."""
+        if self._widget_count is None:
+            self._widget_count = len(self.findChildren(QWidget))
+        return self._widget_count
+
+    def stats(self) -> PageStats:
+        return PageStats(
+            self.objectName(),
+            self.widget_count(),
+            self._materialized,
+            self._builds,
+            self._unloads,
+        )
 
     def add_group(self, name: str):
+        self.materialize()
         grp = group.Group(name, self.inner_area)
         self.innerLayout.insertWidget(self.innerLayout.count() - 1, grp)
-        parent_toolbar = tabtoolbar.find_tabtoolbar(self)  # type: ignore[attr-defined]
-        if not parent_toolbar:
-            raise Exception("Could not find Parent Tabtoolbar")
-
-        parent_toolbar.adjust_verticalsize(grp.height())
+        self._widget_count = None
         return grp
 
     def hide(self):
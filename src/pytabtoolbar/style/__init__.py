@@ -1,37 +1,89 @@
 from .toolbarstyles import (
+    SCOPE_TOOLBAR,
     STYLE_COOL,
     STYLE_THRESHOLD,
     STYLE_VIENNA,
     STYLE_WHITEMERCY,
     Color,
     StyleParams,
+    StyleNotifier,
+    StyleProperty,
+    StyleSnapshot,
+    StylesheetStats,
+    ThemeRules,
+    changed_properties,
+    clear_pixelmetrics,
     create_style,
     format_color,
+    get_cachedstylesheet,
     get_defaultstyle,
     get_pixelmetric,
+    get_propertynames,
     get_scalefactor,
+    get_scopedsheet,
+    get_stylenotifier,
+    get_styleproperties,
     get_styles,
+    get_stylescopes,
     get_stylesheet,
+    get_stylesnapshot,
+    measure_stylesheet,
+    regenerate_styles,
     register_default_styles,
     register_style,
+    set_stylesheet_cachedir,
+    set_stylesheet_minify,
+    store_cachedstylesheet,
+    sync_palette,
+)
+from .toolbuttonstyle import (
+    PixmapCacheStats,
+    TTToolButtonStyle,
+    clear_pixmapcache,
+    get_pixmapcache_stats,
+    set_pixmapcache_limit,
 )
-from .toolbuttonstyle import TTToolButtonStyle
 
 __all__ = [
+    "SCOPE_TOOLBAR",
     "STYLE_COOL",
     "STYLE_THRESHOLD",
     "STYLE_VIENNA",
     "STYLE_WHITEMERCY",
     "Color",
+    "changed_properties",
+    "clear_pixelmetrics",
     "create_style",
     "format_color",
+    "get_cachedstylesheet",
     "get_defaultstyle",
     "get_styles",
     "get_pixelmetric",
+    "get_propertynames",
     "get_scalefactor",
+    "get_scopedsheet",
+    "get_stylenotifier",
+    "get_styleproperties",
+    "get_stylescopes",
     "get_stylesheet",
+    "get_stylesnapshot",
+    "measure_stylesheet",
     "StyleParams",
+    "StyleNotifier",
+    "StyleProperty",
+    "StyleSnapshot",
+    "StylesheetStats",
+    "ThemeRules",
     "register_style",
+    "regenerate_styles",
     "register_default_styles",
+    "set_stylesheet_cachedir",
+    "set_stylesheet_minify",
+    "store_cachedstylesheet",
+    "sync_palette",
     "TTToolButtonStyle",
+    "PixmapCacheStats",
+    "clear_pixmapcache",
+    "get_pixmapcache_stats",
+    "set_pixmapcache_limit",
 ]
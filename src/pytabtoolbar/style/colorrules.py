@@ -0,0 +1,372 @@
+from functools import lru_cache
+import hashlib
+
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Tuple, Union
+
+from PyQt5 import QtCore
+from PyQt5.QtGui import QColor
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:
+    np = None
+
+# Below this many distinct rules the per-call overhead of NumPy outweighs
+# the vectorized evaluation.
+_NUMPY_MIN_RULES = 256
+
+ColorLike = Union["ColorRule", QColor, QtCore.Qt.GlobalColor]
+
+
+class ColorRule(tuple):
+    """A node of a color derivation expression.
+
+    Rules are plain tuples of (operation, arguments, parameters), so equal
+    sub-expressions compare and hash equal and are evaluated only once,
+    even when several themes share them.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, op: str, args: Tuple["ColorRule", ...] = (), params: Tuple = ()):
+        return tuple.__new__(cls, (op, args, params))
+
+    @property
+    def op(self) -> str:
+        return self[0]
+
+    @property
+    def args(self) -> Tuple["ColorRule", ...]:
+        return self[1]
+
+    @property
+    def params(self) -> Tuple:
+        return self[2]
+
+    def roles(self) -> FrozenSet[str]:
+        """Returns the palette roles this rule depends on."""
+        return _roles(self)
+
+
+@lru_cache(maxsize=None)
+def _roles(rule: ColorRule) -> FrozenSet[str]:
+    if rule.op == "role":
+        return frozenset(rule.params)
+    roles = frozenset(rule.params[:1]) if rule.op == "iflight" else frozenset()
+    for arg in rule.args:
+        roles |= _roles(arg)
+    return roles
+
+
+def _rule(color: ColorLike) -> ColorRule:
+    if isinstance(color, ColorRule):
+        return color
+    return ColorRule("const", params=(QColor(color).rgba(),))
+
+
+def role(name: str) -> ColorRule:
+    """The color of a palette role, see TPalette for the available names."""
+    return ColorRule("role", params=(name,))
+
+
+def const(color: Union[QColor, QtCore.Qt.GlobalColor]) -> ColorRule:
+    return _rule(color)
+
+
+def lcomb(c1: ColorLike, c2: ColorLike, f: float) -> ColorRule:
+    """Linear combination `c1 * f + c2 * (1 - f)` of all four channels."""
+    return ColorRule("lcomb", (_rule(c1), _rule(c2)), (f,))
+
+
+def dimmed(c: ColorLike, factor: float) -> ColorRule:
+    return lcomb(c, QtCore.Qt.black, 1 - factor)
+
+
+def coeff(c: ColorLike, cr: float, cg: float, cb: float) -> ColorRule:
+    """Scales the red, green and blue channels; the result is opaque."""
+    return ColorRule("coeff", (_rule(c),), (cr, cg, cb))
+
+
+def add(c1: ColorLike, c2: ColorLike) -> ColorRule:
+    return ColorRule("add", (_rule(c1), _rule(c2)))
+
+
+def basecolor(c: ColorLike) -> ColorRule:
+    """Subtracts the smallest of the red, green and blue channels."""
+    return ColorRule("basecolor", (_rule(c),))
+
+
+def with_alpha(c: ColorLike, alpha: int) -> ColorRule:
+    return ColorRule("alpha", (_rule(c),), (alpha,))
+
+
+def if_light(role_name: str, light: ColorLike, dark: ColorLike) -> ColorRule:
+    """Picks `light` if the palette role is a light color, `dark` otherwise."""
+    return ColorRule("iflight", (_rule(light), _rule(dark)), (role_name,))
+
+
+class ThemeRules:
+    """A theme expressed as derivation rules over the palette roles.
+
+    Every value is either a ColorRule (a single color), a list of
+    (coefficient, ColorRule) gradient stops or a plain property value
+    such as an int or a bool.
+    """
+
+    def __init__(self, values: Dict[str, Any]):
+        self._values: Dict[str, Any] = {}
+        self._dependencies: Union[Dict[str, FrozenSet[str]], None] = None
+        self._subsets: Dict[FrozenSet[str], "ThemeRules"] = {}
+        self._fingerprint: Union[str, None] = None
+        for name, value in values.items():
+            if isinstance(value, (QColor, QtCore.Qt.GlobalColor)):
+                value = _rule(value)
+            elif isinstance(value, list):
+                value = [(coefficient, _rule(c)) for coefficient, c in value]
+            self._values[name] = value
+
+    def __getitem__(self, name: str) -> Any:
+        return self._values[name]
+
+    def items(self):
+        return self._values.items()
+
+    def derive(self, **changes: Any) -> "ThemeRules":
+        values = dict(self._values)
+        values.update(changes)
+        return ThemeRules(values)
+
+    def rules(self, name: str) -> List[ColorRule]:
+        value = self._values[name]
+        if isinstance(value, ColorRule):
+            return [value]
+        elif isinstance(value, list):
+            return [c for _, c in value]
+        return []
+
+    def dependencies(self) -> Dict[str, FrozenSet[str]]:
+        """Maps every color property to the palette roles it is derived from."""
+        if self._dependencies is None:
+            dependencies = {}
+            for name in self._values:
+                rules = self.rules(name)
+                if rules:
+                    dependencies[name] = frozenset().union(*(r.roles() for r in rules))
+            self._dependencies = dependencies
+        return self._dependencies
+
+    def fingerprint(self) -> str:
+        """Returns a digest of the rules that is stable across processes."""
+        if self._fingerprint is None:
+            text = repr(sorted(self._values.items(), key=lambda item: item[0]))
+            self._fingerprint = hashlib.sha1(text.encode()).hexdigest()
+        return self._fingerprint
+
+    def dependents(self, roles: Iterable[str]) -> FrozenSet[str]:
+        """Returns the properties derived from any of the palette `roles`."""
+        roles = frozenset(roles)
+        return frozenset(
+            name for name, used in self.dependencies().items() if used & roles
+        )
+
+    def subset(self, names: FrozenSet[str]) -> "ThemeRules":
+        """Returns the rules of just the properties `names`.
+
+        Subsets are kept, so deriving the same subset again reuses its
+        compiled evaluation order.
+        """
+        subset = self._subsets.get(names)
+        if subset is None:
+            subset = ThemeRules({name: self._values[name] for name in names})
+            self._subsets[names] = subset
+        return subset
+
+
+class _ColorProgram:
+    """All distinct rules of a set of themes, ordered for evaluation.
+
+    Rules are grouped by depth and operation, so every group can be
+    evaluated as a single array operation.
+    """
+
+    def __init__(self, rules: Iterable[ColorRule]):
+        self.index: Dict[ColorRule, int] = {}
+        self.order: List[ColorRule] = []
+        depth: Dict[ColorRule, int] = {}
+        for rule in rules:
+            self._visit(rule, depth)
+
+        levels: Dict[int, Dict[str, List[ColorRule]]] = {}
+        for rule in self.order:
+            levels.setdefault(depth[rule], {}).setdefault(rule.op, []).append(rule)
+        self.levels = [levels[d] for d in sorted(levels)]
+
+    def _visit(self, rule: ColorRule, depth: Dict[ColorRule, int]) -> int:
+        if rule in depth:
+            return depth[rule]
+        d = 1 + max((self._visit(arg, depth) for arg in rule.args), default=-1)
+        depth[rule] = d
+        self.index[rule] = len(self.order)
+        self.order.append(rule)
+        return d
+
+    def evaluate(self, roles: Dict[str, int]) -> List[int]:
+        light = {
+            name: QColor.fromRgba(rgba).lightnessF() > 0.5
+            for name, rgba in roles.items()
+        }
+        if np is not None and len(self.order) >= _NUMPY_MIN_RULES:
+            return self._evaluate_numpy(roles, light)
+        return self._evaluate_python(roles, light)
+
+    def _evaluate_numpy(
+        self, roles: Dict[str, int], light: Dict[str, bool]
+    ) -> List[int]:
+        values = np.zeros((len(self.order), 4))
+        index = self.index
+        for ops in self.levels:
+            for op, rules in ops.items():
+                rows = [index[r] for r in rules]
+                if op in ("role", "const"):
+                    rgba = np.array(
+                        [
+                            roles[r.params[0]] if op == "role" else r.params[0]
+                            for r in rules
+                        ],
+                        dtype=np.int64,
+                    )
+                    values[rows] = np.stack(
+                        [
+                            (rgba >> 16) & 0xFF,
+                            (rgba >> 8) & 0xFF,
+                            rgba & 0xFF,
+                            (rgba >> 24) & 0xFF,
+                        ],
+                        axis=1,
+                    )
+                    continue
+
+                a = values[[index[r.args[0]] for r in rules]]
+                if op == "lcomb":
+                    b = values[[index[r.args[1]] for r in rules]]
+                    f = np.array([r.params[0] for r in rules])[:, None]
+                    result = a * f + b * (1.0 - f)
+                elif op == "add":
+                    result = a + values[[index[r.args[1]] for r in rules]]
+                elif op == "coeff":
+                    result = np.empty_like(a)
+                    result[:, :3] = a[:, :3] * np.array([r.params for r in rules])
+                    result[:, 3] = 255
+                elif op == "basecolor":
+                    result = np.empty_like(a)
+                    result[:, :3] = a[:, :3] - a[:, :3].min(axis=1, keepdims=True)
+                    result[:, 3] = 255
+                elif op == "alpha":
+                    result = a.copy()
+                    result[:, 3] = [r.params[0] for r in rules]
+                elif op == "iflight":
+                    b = values[[index[r.args[1]] for r in rules]]
+                    cond = np.array([light[r.params[0]] for r in rules])[:, None]
+                    result = np.where(cond, a, b)
+                else:
+                    raise Exception("Unknown color rule '{}'".format(op))
+                values[rows] = np.clip(np.trunc(result), 0, 255)
+
+        channels = values.astype(np.int64)
+        packed = (
+            (channels[:, 3] << 24)
+            | (channels[:, 0] << 16)
+            | (channels[:, 1] << 8)
+            | channels[:, 2]
+        )
+        return packed.tolist()
+
+    def _evaluate_python(
+        self, roles: Dict[str, int], light: Dict[str, bool]
+    ) -> List[int]:
+        values: List[Tuple[int, int, int, int]] = []
+        index = self.index
+        for rule in self.order:
+            op = rule.op
+            if op in ("role", "const"):
+                rgba = roles[rule.params[0]] if op == "role" else rule.params[0]
+                values.append(
+                    (
+                        (rgba >> 16) & 0xFF,
+                        (rgba >> 8) & 0xFF,
+                        rgba & 0xFF,
+                        (rgba >> 24) & 0xFF,
+                    )
+                )
+                continue
+
+            a = values[index[rule.args[0]]]
+            if op == "lcomb":
+                b = values[index[rule.args[1]]]
+                f = rule.params[0]
+                fi = 1.0 - f
+                result = tuple(_clamp(x * f + y * fi) for x, y in zip(a, b))
+            elif op == "add":
+                b = values[index[rule.args[1]]]
+                result = tuple(_clamp(x + y) for x, y in zip(a, b))
+            elif op == "coeff":
+                result = tuple(_clamp(x * c) for x, c in zip(a, rule.params)) + (255,)
+            elif op == "basecolor":
+                m = min(a[:3])
+                result = (a[0] - m, a[1] - m, a[2] - m, 255)
+            elif op == "alpha":
+                result = a[:3] + (_clamp(rule.params[0]),)
+            elif op == "iflight":
+                result = a if light[rule.params[0]] else values[index[rule.args[1]]]
+            else:
+                raise Exception("Unknown color rule '{}'".format(op))
+            values.append(result)  # type: ignore
+
+        return [(a << 24) | (r << 16) | (g << 8) | b for r, g, b, a in values]
+
+
+def _clamp(v: Union[int, float]) -> int:
+    v = int(v)
+    if v < 0:
+        v = 0
+    elif v > 255:
+        v = 255
+    return v
+
+
+@lru_cache(maxsize=8)
+def _compile_program(themes: Tuple[ThemeRules, ...]) -> _ColorProgram:
+    return _ColorProgram(
+        rule
+        for theme in themes
+        for name, _ in theme.items()
+        for rule in theme.rules(name)
+    )
+
+
+def derive_values(
+    themes: Dict[str, ThemeRules],
+    roles: Dict[str, int],
+    make_gradient: Callable[[List[Tuple[float, int]]], Any],
+) -> Dict[str, Dict[str, Any]]:
+    """Evaluates the colors of all `themes` for the palette `roles` in one pass.
+
+    `roles` maps role names to ARGB integers. Colors are returned as
+    `make_gradient([(coefficient, argb), ...])`; a single color becomes a
+    one-stop gradient with coefficient 1.0.
+    """
+    program = _compile_program(tuple(themes.values()))
+    rgba = program.evaluate(roles)
+    index = program.index
+
+    result: Dict[str, Dict[str, Any]] = {}
+    for theme_name, theme in themes.items():
+        values: Dict[str, Any] = {}
+        for name, value in theme.items():
+            if isinstance(value, ColorRule):
+                value = make_gradient([(1.0, rgba[index[value]])])
+            elif isinstance(value, list):
+                value = make_gradient([(c, rgba[index[rule]]) for c, rule in value])
+            values[name] = value
+        result[theme_name] = values
+    return result
@@ -0,0 +1,135 @@
+import re
+
+from typing import Dict, List, Tuple
+
+_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+_WHITESPACE_RE = re.compile(r"\s+")
+_RULE_RE = re.compile(r"([^{}]*)\{([^{}]*)\}")
+_GRADIENT_RE = re.compile(r"q(?:linear|radial|conical)gradient\(")
+_STOP_RE = re.compile(r"stop\s*:\s*[-+\d.]+\s+(\w+\([^)]*\)|#\w+|\w+)")
+_STOPTOKEN_RE = re.compile(r"stop\s*:")
+_UNRESOLVED_RE = re.compile(r"%\w+%")
+_COMMA_RE = re.compile(r"\s*,\s*")
+
+Declaration = Tuple[str, str]
+Rule = Tuple[str, List[Declaration]]
+
+
+def _split_declarations(body: str) -> List[str]:
+    """Splits a rule body on semicolons outside of quotes and parentheses."""
+    parts = []
+    depth = 0
+    quote = ""
+    start = 0
+    for pos, char in enumerate(body):
+        if quote:
+            if char == quote:
+                quote = ""
+        elif char in "\"'":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == ";" and depth == 0:
+            parts.append(body[start:pos])
+            start = pos + 1
+    parts.append(body[start:])
+    return parts
+
+
+def _collapse(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def _collapse_value(value: str) -> str:
+    value = _collapse(value)
+    if '"' not in value and "'" not in value:
+        value = _COMMA_RE.sub(",", value)
+    return value
+
+
+def _reduce_gradients(value: str) -> str:
+    """Replaces gradients whose stops all have the same color by that color."""
+    match = _GRADIENT_RE.search(value)
+    while match:
+        start = match.start()
+        depth = 1
+        end = match.end()
+        while end < len(value) and depth:
+            if value[end] == "(":
+                depth += 1
+            elif value[end] == ")":
+                depth -= 1
+            end += 1
+        gradient = value[start:end]
+        stops = _STOP_RE.findall(gradient)
+        colors = {_WHITESPACE_RE.sub("", c) for c in stops}
+        # A stop that is not understood may have any color.
+        if len(colors) == 1 and len(stops) == len(_STOPTOKEN_RE.findall(gradient)):
+            color = _STOP_RE.search(gradient).group(1)  # type: ignore[union-attr]
+            value = value[:start] + color + value[end:]
+            end = start + len(color)
+        match = _GRADIENT_RE.search(value, end)
+    return value
+
+
+def _parse(sheet: str) -> List[Rule]:
+    rules: List[Rule] = []
+    for match in _RULE_RE.finditer(_COMMENT_RE.sub("", sheet)):
+        selector = ",".join(_collapse(s) for s in match.group(1).split(","))
+        declarations: Dict[str, str] = {}
+        for declaration in _split_declarations(match.group(2)):
+            name, sep, value = declaration.partition(":")
+            name = name.strip()
+            value = _collapse_value(value)
+            if not sep or not name or not value or _UNRESOLVED_RE.search(value):
+                continue
+            # Of repeated properties only the last one takes effect.
+            declarations.pop(name, None)
+            declarations[name] = _reduce_gradients(value)
+        if declarations:
+            rules.append((selector, list(declarations.items())))
+    return rules
+
+
+def _merge_duplicates(rules: List[Rule]) -> List[Rule]:
+    """Merges rules with the same selector into their last occurrence.
+
+    Declarations are only moved past the rules in between if none of those
+    rules sets the same property, so the cascade order is preserved no
+    matter which widgets the selectors match.
+    """
+    merged: List[Rule] = []
+    for selector, declarations in rules:
+        for index in range(len(merged) - 1, -1, -1):
+            if merged[index][0] != selector:
+                continue
+            earlier = merged[index][1]
+            names = {name for name, _ in earlier}
+            following = index + 1
+            between = merged[following:]
+            if not any(name in names for _, decls in between for name, _ in decls):
+                del merged[index]
+                current = dict(earlier)
+                for name, value in declarations:
+                    current.pop(name, None)
+                    current[name] = value
+                declarations = list(current.items())
+            break
+        merged.append((selector, declarations))
+    return merged
+
+
+def minify(sheet: str) -> str:
+    """Returns an equivalent, compact version of the stylesheet `sheet`.
+
+    Comments and redundant whitespace are removed, declarations without a
+    value or with an unresolved %placeholder% are dropped, single color
+    gradients become plain colors and rules with the same selector are
+    merged.
+    """
+    return "".join(
+        "{}{{{}}}".format(selector, ";".join(n + ":" + v for n, v in declarations))
+        for selector, declarations in _merge_duplicates(_parse(sheet))
+    )
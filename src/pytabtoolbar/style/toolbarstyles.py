@@ -1,8 +1,27 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+import hashlib
+import os
+import re
 from sys import platform
+import tempfile
+import time
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Final,
+    FrozenSet,
+    Iterable,
+    List,
+    Set,
+    Tuple,
+    Union,
+)
 
-from typing import Any, Dict, Final, List, Union
-
-from PyQt5 import QtCore
+from PyQt5 import QtCore, sip
 from PyQt5.QtCore import (
     QT_VERSION_STR,
     QFile,
@@ -10,12 +29,25 @@ from PyQt5.QtCore import (
     QObject,
     QPoint,
     QSysInfo,
-    QVariant,
 )
 from PyQt5.QtGui import QColor, QGuiApplication, QPalette, QScreen
 from PyQt5.QtWidgets import QApplication, QStyle, QWidget
 
+from pytabtoolbar._version import __version__
 from pytabtoolbar.style import styletemplate  # noqa
+from pytabtoolbar.style.qssminify import minify
+from pytabtoolbar.style.colorrules import (
+    ThemeRules,
+    add,
+    basecolor,
+    coeff,
+    derive_values,
+    dimmed,
+    if_light,
+    lcomb,
+    role,
+    with_alpha,
+)
 from pytabtoolbar.style.qtproperties import Property, PropertyMeta
 
 STYLE_COOL: Final[str] = "Kool"
@@ -23,85 +55,133 @@ STYLE_VIENNA: Final[str] = "Vienna"
 STYLE_THRESHOLD: Final[str] = "Threshold"
 STYLE_WHITEMERCY: Final[str] = "White Mercy"
 
+_HAS_SCREENAT: Final[bool] = tuple(
+    int(part) for part in QT_VERSION_STR.split(".")[:2]
+) >= (5, 10)
+_HAS_PALETTECHANGED: Final[bool] = tuple(
+    int(part) for part in QT_VERSION_STR.split(".")[:2]
+) >= (5, 13)
 
-class Color:
-    def __init__(self, coefficient: float, value: Union[QColor, QtCore.Qt.GlobalColor]):
-        self.coefficient: float = coefficient
-        if isinstance(value, QtCore.Qt.GlobalColor):
-            self.value = QColor(value)
-        else:
-            self.value = value
+_PLACEHOLDER_RE = re.compile(r"%(\w+)%")
+_SCOPE_RE = re.compile(r'\[(TT\w+)="true"\]')
+
+# Style scope of rules that can only be applied to the whole toolbar.
+SCOPE_TOOLBAR: Final[str] = ""
+
+
+def _to_rgba(value: Union[QColor, QtCore.Qt.GlobalColor, int, "Colors"]) -> int:
+    if isinstance(value, QColor):
+        return value.rgba()
+    elif isinstance(value, QtCore.Qt.GlobalColor):
+        return QColor(value).rgba()
+    elif isinstance(value, int):
+        return value
+    elif isinstance(value, Colors):
+        return value[0].rgba
+    raise Exception("Invalid color '{}'".format(value))
+
+
+class Color(tuple):
+    """A gradient stop: a coefficient and a color packed as an ARGB integer.
+
+    Colors are immutable and compare and hash by value; `value` returns a
+    new QColor on every access.
+    """
+
+    __slots__ = ()
+
+    def __new__(
+        cls,
+        coefficient: float,
+        value: Union[QColor, QtCore.Qt.GlobalColor, int, "Colors"],
+    ):
+        if type(value) is QColor:
+            return tuple.__new__(cls, (coefficient, value.rgba()))
+        return tuple.__new__(cls, (coefficient, _to_rgba(value)))
+
+    @property
+    def coefficient(self) -> float:
+        return self[0]
+
+    @property
+    def rgba(self) -> int:
+        return self[1]
+
+    @property
+    def value(self) -> QColor:
+        return QColor.fromRgba(self[1])
 
     def __str__(self):
-        return "Color(coefficient: {}, value: {}".format(self.coefficient, self.value)
+        return "Color(coefficient: {}, value: #{:08x})".format(self[0], self[1])
 
     def __repr__(self):
         return self.__str__()
 
 
-class Colors(QObject):
-    def __init__(
-        self,
-        data: Union[QColor, QtCore.Qt.GlobalColor, List[Color]],
-    ):
-        self._list: List[Color] = []
-        if data:
-            if isinstance(data, QtCore.Qt.GlobalColor):
-                self._list.append(Color(1.0, QColor(data)))
-            elif isinstance(data, QColor):
-                self._list.append(Color(1.0, data))
-            elif isinstance(data, list):
-                self._list = list(data)
-            elif isinstance(data, Colors):
-                self._list = list(data._items)
-            else:
-                raise Exception("Invalid type '{}' passed to Colors".format(type(data)))
+class Colors(tuple):
+    """An immutable gradient made of Color stops.
 
-        super(Colors, self).__init__()
+    A single color is stored as a one-stop gradient; calling the instance
+    returns the color of the first stop.
+    """
 
-    def __call__(self, *args: Any, **kwds: Any) -> Any:
-        if len(self._list) > 0:
-            return self._list[0].value
-        return None
+    __slots__ = ()
 
-    def __getitem__(self, item):
-        return self._list[item]
+    def __new__(
+        cls,
+        data: Union[QColor, QtCore.Qt.GlobalColor, List[Color], "Colors", None] = None,
+    ):
+        if isinstance(data, Colors):
+            return data
+        elif isinstance(data, list):
+            stops: Tuple[Color, ...] = tuple(data)
+        elif isinstance(data, (QColor, QtCore.Qt.GlobalColor)):
+            stops = (Color(1.0, data),)
+        elif data is None:
+            stops = ()
+        elif isinstance(data, tuple):
+            stops = data
+        else:
+            raise Exception("Invalid type '{}' passed to Colors".format(type(data)))
+        return tuple.__new__(cls, stops)
 
-    def __len__(self):
-        return len(self._list)
+    def __call__(self, *args: Any, **kwds: Any) -> Any:
+        if len(self) > 0:
+            return self[0].value
+        return None
 
     @property
     def _items(self):
-        return self._list
+        return list(self)
 
 
 class StyleParams(QObject, metaclass=PropertyMeta):
     AdditionalStyleSheet: str
-    BorderColor = Property(QObject)
-    GroupNameColor = Property(QObject)
-    HideArrowColor = Property(QObject)
-    HorizontalFrameBackgroundColor = Property(QObject)
-    HorizontalFrameBorderColor = Property(QObject)
+    BorderColor = Property(object)
+    GroupNameColor = Property(object)
+    HideArrowColor = Property(object)
+    HorizontalFrameBackgroundColor = Property(object)
+    HorizontalFrameBorderColor = Property(object)
     HorizontalFrameBorderSize = Property(int)
-    PaneColor = Property(QObject)
-    SeparatorColor = Property(QObject)
+    PaneColor = Property(object)
+    SeparatorColor = Property(object)
     TabBorderRadius = Property(int)
-    TabFontColor = Property(QObject)
-    TabHoverBorderColorSide = Property(QObject)
-    TabHoverBorderColorTop = Property(QObject)
-    TabSelectedColor = Property(QObject)
+    TabFontColor = Property(object)
+    TabHoverBorderColorSide = Property(object)
+    TabHoverBorderColorTop = Property(object)
+    TabSelectedColor = Property(object)
     TabSpacing = Property(int)
-    TabSpecialBorderColor = Property(QObject)
-    TabSpecialBorderColorSide = Property(QObject)
-    TabSpecialColor = Property(QObject)
-    TabSpecialFontColor = Property(QObject)
-    TabSpecialHoverBorderColor = Property(QObject)
-    TabSpecialHoverBorderColorSide = Property(QObject)
-    TabSpecialHoverColor = Property(QObject)
-    TabUnselectedColor = Property(QObject)
-    TabUnselectedHoverBorderColorSide = Property(QObject)
-    TabUnselectedHoverBorderColorTop = Property(QObject)
-    ToolbarBackgroundColor = Property(QObject)
+    TabSpecialBorderColor = Property(object)
+    TabSpecialBorderColorSide = Property(object)
+    TabSpecialColor = Property(object)
+    TabSpecialFontColor = Property(object)
+    TabSpecialHoverBorderColor = Property(object)
+    TabSpecialHoverBorderColorSide = Property(object)
+    TabSpecialHoverColor = Property(object)
+    TabUnselectedColor = Property(object)
+    TabUnselectedHoverBorderColorSide = Property(object)
+    TabUnselectedHoverBorderColorTop = Property(object)
+    ToolbarBackgroundColor = Property(object)
     UseTemplateSheet: bool
 
     def __init__(self, parent=None):
@@ -174,83 +254,566 @@ class StyleParams(QObject, metaclass=PropertyMeta):
         return new_style
 
 
+@dataclass(frozen=True)
+class StyleProperty:
+    """How a style property is read and filled into the template.
+
+    `kind` is "int", "str", "bool" or "object"; `formatter` turns a value
+    into its stylesheet text, or None if the placeholder is left as is.
+    """
+
+    name: str
+    token: str
+    kind: str
+    formatter: Callable[[Any], Union[str, None]]
+
+
+_PROPERTY_KINDS: Final[Dict[str, str]] = {
+    "int": "int",
+    "QString": "str",
+    "bool": "bool",
+    "str": "str",
+}
+
+
+@lru_cache(maxsize=None)
+def get_styleproperties(params_class: type = StyleParams) -> Dict[str, StyleProperty]:
+    """Returns the descriptors of the style properties of `params_class`.
+
+    The table is built once per class from its Qt properties and its
+    annotated plain attributes, so subclasses of StyleParams that add
+    properties are filled without any further introspection.
+    """
+    kinds: Dict[str, str] = {}
+    for klass in reversed(params_class.__mro__):
+        for name, annotation in vars(klass).get("__annotations__", {}).items():
+            kinds[name] = _PROPERTY_KINDS.get(
+                getattr(annotation, "__name__", ""), "object"
+            )
+    meta = params_class.staticMetaObject
+    for i in range(meta.propertyCount()):
+        prop = meta.property(i)
+        if prop.name() != "objectName":
+            kinds[prop.name()] = _PROPERTY_KINDS.get(prop.typeName(), "object")
+
+    formatters = {
+        "int": _format_int,
+        "str": _format_px,
+        "bool": _format_none,
+        "object": _format_value,
+    }
+    return {
+        name: StyleProperty(name, "%{}%".format(name), kind, formatters[kind])
+        for name, kind in kinds.items()
+    }
+
+
+def _hashable(value: Any) -> Any:
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+class StyleSnapshot:
+    """Read-only view of the values of a StyleParams, shared between toolbars."""
+
+    __slots__ = ("name", "_params_class", "_values", "_key")
+
+    def __init__(
+        self,
+        values: Dict[str, Any],
+        name: str = "",
+        params_class: type = StyleParams,
+    ):
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "_params_class", params_class)
+        object.__setattr__(self, "_values", values)
+        object.__setattr__(self, "_key", None)
+
+    @classmethod
+    def from_params(cls, params: StyleParams, name: str = "") -> "StyleSnapshot":
+        values: Dict[str, Any] = {
+            prop_name: getattr(params, prop_name)
+            for prop_name in get_styleproperties(type(params))
+        }
+        return cls(values, name or params.objectName(), type(params))
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("StyleSnapshot is read-only, use evolve()")
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, StyleSnapshot):
+            return NotImplemented
+        return self.key() == other.key()
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+    def items(self):
+        return self._values.items()
+
+    def key(self) -> Tuple:
+        """Returns a hashable key made of the values that affect the stylesheet."""
+        if self._key is None:
+            key = tuple(
+                (name, _hashable(value)) for name, value in self._values.items()
+            )
+            object.__setattr__(self, "_key", key)
+        return self._key
+
+    def evolve(self, **changes: Any) -> "StyleSnapshot":
+        unknown = changes.keys() - self._values.keys()
+        if unknown:
+            raise AttributeError(
+                "Unknown style properties: {}".format(", ".join(sorted(unknown)))
+            )
+        values = dict(self._values)
+        values.update(changes)
+        return StyleSnapshot(values, self.name, self._params_class)
+
+    def renamed(self, name: str) -> "StyleSnapshot":
+        return StyleSnapshot(self._values, name, self._params_class)
+
+    def to_params(self) -> StyleParams:
+        params = self._params_class()
+        for name, value in self._values.items():
+            setattr(params, name, value)
+        params.setObjectName(self.name)
+        return params
+
+
 class TPalette:
-    def __init__(self):
-        self.htext: QColor = QPalette().highlightedText().color()
-        self.highlight: QColor = QPalette().highlight().color()
-        self.light: QColor = QPalette().light().color()
-        self.midlight: QColor = QPalette().midlight().color()
-        self.dark: QColor = QPalette().dark().color()
-        self.window: QColor = QPalette().window().color()
-        self.text: QColor = QPalette().text().color()
+    def __init__(self, palette: Union[QPalette, None] = None):
+        if palette is None:
+            palette = QPalette()
+        self.htext: QColor = palette.highlightedText().color()
+        self.highlight: QColor = palette.highlight().color()
+        self.light: QColor = palette.light().color()
+        self.midlight: QColor = palette.midlight().color()
+        self.dark: QColor = palette.dark().color()
+        self.window: QColor = palette.window().color()
+        self.text: QColor = palette.text().color()
+
+    def roles(self) -> Dict[str, int]:
+        return {name: color.rgba() for name, color in vars(self).items()}
+
+
+class _StylesheetCache:
+    """Bounded LRU of generated stylesheets keyed by effective style values."""
+
+    def __init__(self, maxsize: int = 16):
+        self.maxsize = maxsize
+        self._sheets: "OrderedDict[Tuple, str]" = OrderedDict()
+
+    def get(self, key: Tuple) -> Union[str, None]:
+        sheet = self._sheets.get(key)
+        if sheet is not None:
+            self._sheets.move_to_end(key)
+        return sheet
+
+    def put(self, key: Tuple, sheet: str):
+        self._sheets[key] = sheet
+        self._sheets.move_to_end(key)
+        while len(self._sheets) > self.maxsize:
+            self._sheets.popitem(last=False)
+
+    def clear(self):
+        self._sheets.clear()
+
+
+class _DiskCache:
+    """LRU of generated stylesheets on disk, one file per key."""
+
+    def __init__(self, path: str, maxsize: int = 8):
+        self.path = path
+        self.maxsize = maxsize
+
+    def _filename(self, key: str) -> str:
+        return os.path.join(self.path, key + ".qss")
+
+    def get(self, key: str) -> Union[str, None]:
+        filename = self._filename(key)
+        try:
+            with open(filename, encoding="utf-8", newline="") as sheet_file:
+                sheet = sheet_file.read()
+            os.utime(filename)
+        except OSError:
+            return None
+        return sheet
+
+    def put(self, key: str, sheet: str):
+        tmpname = None
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            fd, tmpname = tempfile.mkstemp(dir=self.path, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8", newline="") as sheet_file:
+                sheet_file.write(sheet)
+            os.replace(tmpname, self._filename(key))
+            self._prune()
+        except OSError:
+            # The cache is an optimization only, never fail a restyle for it.
+            if tmpname is not None and os.path.exists(tmpname):
+                os.remove(tmpname)
+
+    def _prune(self):
+        entries = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".qss"):
+                entries.append((entry.stat().st_mtime, entry.path))
+        entries.sort()
+        for _, filename in entries[: max(len(entries) - self.maxsize, 0)]:
+            os.remove(filename)
+
+
+StyleCreator = Union[
+    StyleParams,
+    StyleSnapshot,
+    ThemeRules,
+    Callable[[], Union[StyleParams, StyleSnapshot]],
+]
+
+
+def _colors_from_stops(stops: List[Tuple[float, int]]) -> Colors:
+    return Colors([Color(coefficient, rgba) for coefficient, rgba in stops])
+
+
+class StyleNotifier(QObject):
+    """Announces styles that changed with the application palette.
+
+    StylesChanged carries a dict mapping the name of every affected style
+    to the frozenset of its properties that changed. ScreensChanged is
+    emitted when a screen is added or removed or its DPI changes.
+    """
+
+    StylesChanged = QtCore.pyqtSignal(dict)
+    ScreensChanged = QtCore.pyqtSignal()
 
 
 class _Styles:
-    _style_map: Dict[str, StyleParams] = {}
+    _style_map: Dict[str, StyleCreator] = {}
     _style_template: str
+    _template_version: str
 
     def __init__(self):
+        self._materialized: Dict[str, StyleSnapshot] = {}
+        self._palette: Union[TPalette, None] = None
+        self._palette_override: Union[QPalette, None] = None
+        self._default_snapshot: Union[StyleSnapshot, None] = None
+        self._palette_version = 0
+        self._palette_key = 0
+        self._tracking_changes = False
         template = QFile(":/tt/StyleTemplate.qss")
         template.open(QFile.ReadOnly)
         self._style_template = bytes(template.readAll()).decode()
-
-    def register_style(self, style_name: str, creator: StyleParams):
+        self._template_version = hashlib.sha1(self._style_template.encode()).hexdigest()
+        self.stylesheet_cache = _StylesheetCache()
+        self.notifier = StyleNotifier()
+        self.disk_cache: Union[_DiskCache, None] = None
+        self._scalefactors: Dict[QScreen, float] = {}
+        self._pixelmetrics: Dict[int, Dict[int, int]] = {}
+        self.minify = False
+
+    def register_style(self, style_name: str, creator: StyleCreator):
         if style_name not in self._style_map:
             self._style_map[style_name] = creator
 
     def unregister_style(self, style_name):
         if style_name in self._style_map:
             self._style_map.pop(style_name)
+            self._materialized.pop(style_name, None)
+
+    def track_changes(self):
+        if self._tracking_changes:
+            return
+        app = QGuiApplication.instance()
+        if app is None:
+            return
+        if _HAS_PALETTECHANGED:
+            app.paletteChanged.connect(self._palette_changed)
+        else:
+            self._palette_key = app.palette().cacheKey()
+        app.screenAdded.connect(self._screen_added)
+        app.screenRemoved.connect(self._dpi_changed)
+        for screen in app.screens():
+            screen.logicalDotsPerInchChanged.connect(self._dpi_changed)
+        self._tracking_changes = True
+
+    def sync_palette(self):
+        # Without QGuiApplication.paletteChanged the widgets report changes.
+        if _HAS_PALETTECHANGED or not self._tracking_changes:
+            return
+        key = QGuiApplication.palette().cacheKey()
+        if key != self._palette_key:
+            self._palette_key = key
+            self._palette_changed()
+
+    def _palette_changed(self, *args):
+        self._palette_version += 1
+        old_palette = self._palette
+        self._palette = None
+        if old_palette is None or not self._materialized:
+            self._materialized.clear()
+            return
+        old_roles = old_palette.roles()
+        roles = {
+            name
+            for name, rgba in self.palette().roles().items()
+            if old_roles.get(name) != rgba
+        }
+        changes = self._rederive(roles)
+        if changes:
+            self.notifier.StylesChanged.emit(changes)
+
+    def _rederive(self, roles: Set[str]) -> Dict[str, FrozenSet[str]]:
+        """Recomputes the properties of the materialized styles derived from `roles`.
+
+        Returns the changed properties by style name.
+        """
+        themes: Dict[str, ThemeRules] = {}
+        for name in self._materialized:
+            creator = self._style_map.get(name)
+            if isinstance(creator, ThemeRules):
+                dependents = creator.dependents(roles)
+                if dependents:
+                    themes[name] = creator.subset(dependents)
+        changes = self._recreate()
+
+        if themes:
+            derived = derive_values(themes, self.palette().roles(), _colors_from_stops)
+            for name, values in derived.items():
+                snapshot = self._materialized[name]
+                new_snapshot = snapshot.evolve(**values)
+                self._materialized[name] = new_snapshot
+                changes[name] = frozenset(changed_properties(snapshot, new_snapshot))
+        return {name: changed for name, changed in changes.items() if changed}
+
+    def _recreate(self) -> Dict[str, FrozenSet[str]]:
+        # What styles from callables depend on is unknown, create them again.
+        changes: Dict[str, FrozenSet[str]] = {}
+        for name, snapshot in list(self._materialized.items()):
+            creator = self._style_map.get(name)
+            if isinstance(creator, (ThemeRules, StyleSnapshot)):
+                continue
+            del self._materialized[name]
+            new_snapshot = self.get_snapshot(name)
+            if new_snapshot is not None:
+                changes[name] = frozenset(changed_properties(snapshot, new_snapshot))
+        return changes
+
+    def _screen_added(self, screen: QScreen):
+        screen.logicalDotsPerInchChanged.connect(self._dpi_changed)
+        self._dpi_changed()
+
+    def _dpi_changed(self, *args):
+        self._materialized.clear()
+        self._scalefactors.clear()
+        self.notifier.ScreensChanged.emit()
+
+    def pixelmetric(self, qstyle: QStyle, metric: QStyle.PixelMetric) -> int:
+        # The address of the C++ object, wrappers may be short-lived.
+        key = sip.unwrapinstance(qstyle)
+        metrics = self._pixelmetrics.get(key)
+        if metrics is None:
+            metrics = self._pixelmetrics[key] = {}
+            qstyle.destroyed.connect(lambda: self._pixelmetrics.pop(key, None))
+        size = metrics.get(metric)
+        if size is None:
+            size = metrics[metric] = qstyle.pixelMetric(metric)
+        return size
+
+    def clear_pixelmetrics(self):
+        for metrics in self._pixelmetrics.values():
+            metrics.clear()
+
+    def scalefactor(self, screen: Union[QScreen, None]) -> float:
+        if screen is None:
+            return 1.0
+        factor = self._scalefactors.get(screen)
+        if factor is None:
+            self.track_changes()
+            factor = screen.logicalDotsPerInchY() / 96.0
+            self._scalefactors[screen] = factor
+        return factor
+
+    def palette(self) -> TPalette:
+        if self._palette is None:
+            self._palette = TPalette(self._palette_override)
+        return self._palette
+
+    def set_palette(self, palette: Union[QPalette, None]):
+        self._palette_override = palette
+        self._palette_version += 1
+        self._palette = None
+
+    def derive_snapshots(
+        self, themes: Dict[str, ThemeRules]
+    ) -> Dict[str, StyleSnapshot]:
+        self.track_changes()
+        derived = derive_values(themes, self.palette().roles(), _colors_from_stops)
+        if self._default_snapshot is None:
+            self._default_snapshot = StyleSnapshot.from_params(StyleParams())
+        default = self._default_snapshot
+        return {
+            name: default.evolve(**values).renamed(name)
+            for name, values in derived.items()
+        }
+
+    def regenerate(self) -> Dict[str, StyleSnapshot]:
+        themes = {
+            name: creator
+            for name, creator in self._style_map.items()
+            if isinstance(creator, ThemeRules)
+        }
+        snapshots = self.derive_snapshots(themes)
+        changes = self._recreate()
+        for name, snapshot in snapshots.items():
+            old_snapshot = self._materialized.get(name)
+            if old_snapshot is not None:
+                changed = changed_properties(old_snapshot, snapshot)
+                if not changed:
+                    snapshots[name] = old_snapshot
+                    continue
+                changes[name] = frozenset(changed)
+            self._materialized[name] = snapshot
+        changes = {name: changed for name, changed in changes.items() if changed}
+        if changes:
+            self.notifier.StylesChanged.emit(changes)
+        return snapshots
+
+    def disk_key(self, style_name: str) -> Union[str, None]:
+        """Returns the on-disk cache key of a style registered as ThemeRules."""
+        creator = self._style_map.get(style_name)
+        if self.disk_cache is None or not isinstance(creator, ThemeRules):
+            return None
+        roles = sorted(self.palette().roles().items())
+        text = "|".join(
+            [
+                style_name,
+                repr(roles),
+                creator.fingerprint(),
+                self._template_version,
+                __version__,
+                QT_VERSION_STR,
+                str(self.minify),
+            ]
+        )
+        return hashlib.sha1(text.encode()).hexdigest()
+
+    def is_materialized(self, snapshot: StyleSnapshot) -> bool:
+        return self._materialized.get(snapshot.name) is snapshot
+
+    def palette_version(self) -> int:
+        return self._palette_version
 
     def get_styletemplate(self):
         return self._style_template
 
+    def get_templateversion(self) -> str:
+        return self._template_version
+
     def is_registered(self, style_name: str) -> bool:
         return style_name in self._style_map
 
     def get_registered(self) -> List[str]:
         return list(self._style_map.keys())
 
-    def get_style(self, style_name: str) -> Union[StyleParams, None]:
-        if self.is_registered(style_name):
-            return self._style_map[style_name]
-        else:
+    def get_snapshot(self, style_name: str) -> Union[StyleSnapshot, None]:
+        if not self.is_registered(style_name):
             return None
+        creator = self._style_map[style_name]
+        if isinstance(creator, StyleParams):
+            # Registered params may still be changed by their owner.
+            return StyleSnapshot.from_params(creator, style_name)
+        snapshot = self._materialized.get(style_name)
+        if snapshot is None:
+            if isinstance(creator, StyleSnapshot):
+                style = creator
+            elif isinstance(creator, ThemeRules):
+                style = self.derive_snapshots({style_name: creator})[style_name]
+            else:
+                self.track_changes()
+                style = creator()
+            if isinstance(style, StyleParams):
+                snapshot = StyleSnapshot.from_params(style, style_name)
+            elif style.name != style_name:
+                snapshot = style.renamed(style_name)
+            else:
+                snapshot = style
+            self._materialized[style_name] = snapshot
+        return snapshot
 
 
 _styles = _Styles()
 
 
-def format_color(col: Union[QColor, List]) -> str:
-    if isinstance(col, QColor) or isinstance(col, QtCore.Qt.GlobalColor):
-        col = QColor(col)
-        return "rgba({0}, {1}, {2}, {3})".format(
-            col.red(), col.green(), col.blue(), col.alpha()
-        )
+def _format_rgba(rgba: int) -> str:
+    return "rgba({0}, {1}, {2}, {3})".format(
+        (rgba >> 16) & 0xFF, (rgba >> 8) & 0xFF, rgba & 0xFF, (rgba >> 24) & 0xFF
+    )
+
+
+@lru_cache(maxsize=256)
+def _format_colors(colors: Colors) -> str:
+    if len(colors) == 1:
+        return _format_rgba(colors[0].rgba)
+    result = "qlineargradient(x1:0, y1:1, x2:0, y2:0"
+    for color in colors:
+        result += ", stop:{} {}".format(color.coefficient, _format_rgba(color.rgba))
+    result += ")"
+    return result
+
+
+def format_color(col: Union[QColor, QtCore.Qt.GlobalColor, Color, Colors, List]) -> str:
+    if isinstance(col, Colors):
+        return _format_colors(col)
     elif isinstance(col, Color):
-        format_color(col.value)
-    else:
-        size = len(col)
-        if size == 1:
-
-            return format_color(col[0].value)
-        result = "qlineargradient(x1:0, y1:1, x2:0, y2:0"
-        for color in col:
-            result += ", stop:{} {}".format(
-                color.coefficient, format_color(color.value)
-            )
-        result += ")"
-        return result
+        return _format_rgba(col.rgba)
+    elif isinstance(col, (QColor, QtCore.Qt.GlobalColor)):
+        return _format_rgba(_to_rgba(col))
+    return _format_colors(Colors(list(col)))
 
 
 def get_styletemplate():
     return _styles.get_styletemplate()
 
 
-def register_style(style_name: str, creator: StyleParams):
+def get_stylenotifier() -> StyleNotifier:
+    return _styles.notifier
+
+
+def register_style(style_name: str, creator: StyleCreator):
+    """Registers a style under `style_name` unless the name is already taken.
+
+    `creator` is either a ready StyleParams or StyleSnapshot, ThemeRules
+    or a callable returning a StyleParams or StyleSnapshot. Callables and
+    rules are only evaluated the first time the style is needed; the
+    result is kept until the application palette or a screen's DPI
+    changes.
+    """
     return _styles.register_style(style_name, creator)
 
 
+def sync_palette():
+    """Updates the styles after an ApplicationPaletteChange event on Qt < 5.13."""
+    _styles.sync_palette()
+
+
+def regenerate_styles(
+    palette: Union[QPalette, None] = None
+) -> Dict[str, StyleSnapshot]:
+    """Derives all rule based styles from `palette`, None for the application's."""
+    _styles.set_palette(palette)
+    return _styles.regenerate()
+
+
 def unregister_style(style_name: str):
     _styles.unregister_style(style_name)
 
@@ -282,479 +845,601 @@ def get_defaultstyle() -> str:
     return style
 
 
-def fill_style(style: str, params: StyleParams) -> str:
-    style = ""
-    if params.UseTemplateSheet:
-        style = get_styletemplate()
-    style += params.AdditionalStyleSheet
-
-    num_props = params.metaObject().propertyCount()
-    for i in range(num_props):
-        prop = params.metaObject().property(i)
-        if prop.name() == "objectName":
-            continue
-        if prop.type() == QVariant.Bool:
-            continue
-        propstr = "%{0}%".format(prop.name())
-
-        if propstr not in style:
-            continue
-
-        property = params.property(prop.name())
-        if prop.type() is QVariant.String:
-            style = style.replace(propstr, "{0}px".format(property))
-        elif prop.type() is QVariant.Int or prop.type() == 2:
-            style = style.replace(propstr, "{0}".format(property))
-        elif prop.type() is QVariant.UserType:
-            colors = property.value()
-            style = style.replace(propstr, "{0}".format(format_color(colors)))
-        elif prop.type() == 39:
-            colors = property
-
-            style = style.replace(propstr, "{0}".format(format_color(colors)))
-    return style
+class _CompiledTemplate:
+    """A stylesheet template split into literal segments and placeholder slots.
+
+    The template text is scanned once; rendering only fills the slots and
+    joins the precomputed pieces.
+    """
+
+    __slots__ = ("pieces", "slots", "placeholders")
+
+    def __init__(self, text: str):
+        self.pieces: List[str] = []
+        self.slots: List[Tuple[int, str]] = []
+        pos = 0
+        for match in _PLACEHOLDER_RE.finditer(text):
+            start = match.start()
+            self.pieces.append(text[pos:start])
+            self.slots.append((len(self.pieces), match.group(1)))
+            self.pieces.append(match.group(0))
+            pos = match.end()
+        self.pieces.append(text[pos:])
+        self.placeholders: Tuple[str, ...] = tuple(
+            dict.fromkeys(name for _, name in self.slots)
+        )
 
+    def render(self, values: Dict[str, str]) -> str:
+        if not self.slots:
+            return self.pieces[0]
+        pieces = list(self.pieces)
+        for index, name in self.slots:
+            if name in values:
+                pieces[index] = values[name]
+        return "".join(pieces)
 
-def create_style(style_name: str) -> Union[StyleParams, None]:
-    style = _styles.get_style(style_name)
-    return style.copy()
 
+@lru_cache(maxsize=32)
+def _compile_template(text: str) -> _CompiledTemplate:
+    return _CompiledTemplate(text)
 
-def get_stylesheet(style: StyleParams) -> str:
-    stylestr = fill_style("", style)
-    return stylestr
 
+class _ScopedTemplate:
+    """A stylesheet template split into rule blocks grouped by scope.
 
-def get_scalefactor(widget: QWidget) -> float:
-    version = QT_VERSION_STR.split(".")
-    screen: QScreen
-    if int(version[0]) >= 5 and int(version[1]) >= 10:
-        screen = QGuiApplication.screenAt(widget.mapToGlobal(QPoint(0, 0)))
-    else:
-        screen_nbr = QApplication.desktop().screenNumber(
-            widget.mapToGlobal(QPoint(0, 0))
-        )
-        screens = QGuiApplication.screens()
-        screen = screens[screen_nbr]
+    The scope of a rule is the TT* marker property in its selector, e.g.
+    "TTSeparator", so its sheet can be applied to just the widgets that
+    carry the marker. Rules without a common marker belong to
+    SCOPE_TOOLBAR.
+    """
+
+    def __init__(self, text: str):
+        blocks: Dict[str, List[str]] = {}
+        for block in text.split("}")[:-1]:
+            selector = block.split("{", 1)[0]
+            scopes = {
+                (_SCOPE_RE.findall(part) or [SCOPE_TOOLBAR])[0]
+                for part in selector.split(",")
+            }
+            scope = scopes.pop() if len(scopes) == 1 else SCOPE_TOOLBAR
+            blocks.setdefault(scope, []).append(block + "}")
+        self.templates: Dict[str, _CompiledTemplate] = {
+            scope: _CompiledTemplate("".join(parts)) for scope, parts in blocks.items()
+        }
 
-    factor = screen.logicalDotsPerInchY() / 96.0
+    def scopes(self, names: Iterable[str]) -> Set[str]:
+        names = set(names)
+        return {
+            scope
+            for scope, template in self.templates.items()
+            if names.intersection(template.placeholders)
+        }
 
-    return factor
 
+@lru_cache(maxsize=4)
+def _scope_template(text: str) -> _ScopedTemplate:
+    return _ScopedTemplate(text)
 
-def get_pixelmetric(metric: QStyle.PixelMetric) -> int:
-    if metric == QStyle.PM_SmallIconSize:
-        return 16
-    elif metric == QStyle.PM_LargeIconSize:
-        return 32
 
-    return QApplication.style().pixelMetrix(metric)
+def _format_none(value: Any) -> None:
+    return None
 
 
-def _clampcolor(v: Union[int, float]) -> int:
-    v = int(v)
-    if v < 0:
-        v = 0
-    elif v > 255:
-        v = 255
-    return v
+def _format_int(value: Any) -> Union[str, None]:
+    if value is None or isinstance(value, bool):
+        return None
+    return "{0}".format(value)
 
 
-def _lcomb(
-    c1: Union[QColor, QtCore.Qt.GlobalColor, Colors],
-    c2: Union[QColor, QtCore.Qt.GlobalColor, Colors],
-    f: float,
-) -> QColor:
-    fi = 1.0 - f
-    if isinstance(c1, Colors):
-        c1 = c1[0].value
+def _format_px(value: Any) -> Union[str, None]:
+    if value is None:
+        return None
+    return "{0}px".format(value)
 
-    if isinstance(c2, Colors):
-        c2 = c2[0].value
-    c1 = QColor(c1)
-    c2 = QColor(c2)
 
-    return QColor(
-        _clampcolor(c1.red() * f + c2.red() * fi),
-        _clampcolor(c1.green() * f + c2.green() * fi),
-        _clampcolor(c1.blue() * f + c2.blue() * fi),
-        _clampcolor(c1.alpha() * f + c2.alpha() * fi),
-    )
+def _format_value(value: Any) -> Union[str, None]:
+    if value is None or isinstance(value, bool):
+        return None
+    elif isinstance(value, int):
+        return "{0}".format(value)
+    elif isinstance(value, str):
+        return "{0}px".format(value)
+    return "{0}".format(format_color(value))
+
 
+def fill_style(style: str, params: Union[StyleParams, StyleSnapshot]) -> str:
+    if isinstance(params, StyleParams):
+        params = StyleSnapshot.from_params(params)
+    templates: List[_CompiledTemplate] = []
+    if params.UseTemplateSheet:
+        templates.append(_compile_template(get_styletemplate()))
+    if params.AdditionalStyleSheet:
+        templates.append(_compile_template(params.AdditionalStyleSheet))
+
+    values = _format_values(params, templates)
+    return "".join(template.render(values) for template in templates)
+
+
+def _format_values(
+    params: StyleSnapshot, templates: Iterable[_CompiledTemplate]
+) -> Dict[str, str]:
+    properties = get_styleproperties(params._params_class)
+    values: Dict[str, str] = {}
+    for template in templates:
+        for name in template.placeholders:
+            prop = properties.get(name)
+            if prop is None or name in values or name == "AdditionalStyleSheet":
+                continue
+            value = prop.formatter(getattr(params, name))
+            if value is not None:
+                values[name] = value
+    return values
+
+
+def changed_properties(old: StyleSnapshot, new: StyleSnapshot) -> Set[str]:
+    """Returns the names of the properties whose values differ."""
+    old_values = dict(old.key())
+    return {name for name, value in new.key() if old_values.get(name) != value}
+
+
+def get_stylescopes(style: StyleSnapshot, names: Iterable[str]) -> Set[str]:
+    """Returns the scopes whose rules use any of the properties `names`.
+
+    SCOPE_TOOLBAR is part of the result whenever the change cannot be
+    limited to scoped rules.
+    """
+    names = set(names)
+    if not names:
+        return set()
+    if not style.UseTemplateSheet or names & {
+        "UseTemplateSheet",
+        "AdditionalStyleSheet",
+    }:
+        return {SCOPE_TOOLBAR}
+    scopes = _scope_template(get_styletemplate()).scopes(names)
+    if style.AdditionalStyleSheet and names.intersection(
+        _compile_template(style.AdditionalStyleSheet).placeholders
+    ):
+        scopes.add(SCOPE_TOOLBAR)
+    return scopes
+
+
+def get_scopedsheet(style: StyleSnapshot, scope: str) -> str:
+    """Returns the part of the template stylesheet that belongs to `scope`."""
+    key = (_styles.get_templateversion(), _styles.minify, scope, style.key())
+    stylestr = _styles.stylesheet_cache.get(key)
+    if stylestr is None:
+        template = _scope_template(get_styletemplate()).templates.get(scope)
+        if template is None:
+            return ""
+        stylestr = template.render(_format_values(style, [template]))
+        if _styles.minify:
+            stylestr = minify(stylestr)
+        _styles.stylesheet_cache.put(key, stylestr)
+    return stylestr
 
-def _dimmed(c: QColor, factor: float) -> QColor:
-    return _lcomb(c, QtCore.Qt.black, 1 - factor)
 
+def get_stylesnapshot(style_name: str) -> Union[StyleSnapshot, None]:
+    """Returns the shared, read-only snapshot of a registered style."""
+    return _styles.get_snapshot(style_name)
 
-def _coeff(c: QColor, cr: float, cg: float, cb: float) -> QColor:
-    return QColor(
-        _clampcolor(c.red() * cr),
-        _clampcolor(c.green() * cg),
-        _clampcolor(c.blue() * cb),
-    )
 
+def create_style(style_name: str) -> Union[StyleParams, None]:
+    """Returns a modifiable copy of a registered style."""
+    snapshot = _styles.get_snapshot(style_name)
+    if snapshot is None:
+        return None
+    return snapshot.to_params()
+
+
+def get_stylesheet(style: Union[str, StyleParams, StyleSnapshot]) -> str:
+    if isinstance(style, str):
+        style = _styles.get_snapshot(style)
+    elif isinstance(style, StyleParams):
+        style = StyleSnapshot.from_params(style)
+    key = (_styles.get_templateversion(), _styles.minify, style.key())
+    stylestr = _styles.stylesheet_cache.get(key)
+    if stylestr is None:
+        stylestr = fill_style("", style)
+        if _styles.minify:
+            stylestr = minify(stylestr)
+        _styles.stylesheet_cache.put(key, stylestr)
+    return stylestr
 
-def _add(c1: QColor, c2: QColor) -> QColor:
-    return QColor(
-        _clampcolor(c1.red() + c2.red()),
-        _clampcolor(c1.green() + c2.green()),
-        _clampcolor(c1.blue() + c2.blue()),
-        _clampcolor(c1.alpha() + c2.alpha()),
+
+def set_stylesheet_minify(enabled: bool):
+    """Minifies generated stylesheets before they are handed to Qt.
+
+    See qssminify.minify for what the stage removes. Sheets that are
+    already applied are not touched; restyle to apply minified ones.
+    """
+    _styles.minify = enabled
+
+
+@dataclass
+class StylesheetStats:
+    """Sizes in characters and Qt parse times in seconds of a stylesheet."""
+
+    size: int
+    minified_size: int
+    parse_time: float
+    minified_parse_time: float
+
+
+def _parse_time(sheet: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        widget = QWidget()
+        start = time.perf_counter()
+        widget.setStyleSheet(sheet)
+        widget.ensurePolished()
+        best = min(best, time.perf_counter() - start)
+        widget.deleteLater()
+    return best
+
+
+def measure_stylesheet(
+    style: Union[str, StyleParams, StyleSnapshot], repeat: int = 5
+) -> StylesheetStats:
+    """Compares the plain and the minified stylesheet of `style`.
+
+    The parse time is the best of `repeat` runs of applying the sheet to
+    a fresh widget, which makes Qt parse it from scratch.
+    """
+    if isinstance(style, str):
+        style = _styles.get_snapshot(style)
+    elif isinstance(style, StyleParams):
+        style = StyleSnapshot.from_params(style)
+    sheet = fill_style("", style)
+    minified = minify(sheet)
+    return StylesheetStats(
+        len(sheet),
+        len(minified),
+        _parse_time(sheet, repeat),
+        _parse_time(minified, repeat),
     )
 
 
-def _basecolor(c: QColor) -> QColor:
-    min_color = min(c.red(), c.green(), c.blue())
-    return QColor(c.red() - min_color, c.green() - min_color, c.blue() - min_color)
+def set_stylesheet_cachedir(path: Union[str, None], maxsize: int = 8):
+    """Keeps up to `maxsize` startup stylesheets in `path`, None disables it."""
+    _styles.disk_cache = _DiskCache(path, maxsize) if path else None
 
 
-def register_default_styles():
-    palette: TPalette = TPalette()
-    style_kool = StyleParams()
-    style_kool.UseTemplateSheet = True
-    style_kool.AdditionalStyleSheet = ""
-    style_kool.TabBorderRadius = 0
-    style_kool.TabFontColor = Colors(palette.text)
-    style_kool.ToolbarBackgroundColor = Colors(palette.window)
-    style_kool.BorderColor = Colors(_dimmed(palette.light, 0.25))
-    style_kool.GroupNameColor = Colors(_lcomb(palette.text, palette.midlight, 0.4))
-    style_kool.TabSpecialColor = Colors(
-        [
-            Color(0.0, _dimmed(palette.highlight, 0.2)),
-            Color(1.0, palette.highlight),
-        ]
-    )
-    style_kool.TabSpecialHoverColor = Colors(
-        [
-            Color(0.0, style_kool.TabSpecialColor[1].value),
-            Color(1.0, style_kool.TabSpecialColor[0].value),
-        ]
-    )
-    style_kool.TabSpecialHoverBorderColor = Colors(palette.highlight)
-    style_kool.TabSpecialHoverBorderColorSide = Colors(
-        style_kool.TabSpecialHoverBorderColor()
-    )
-    style_kool.TabSpecialBorderColor = Colors(palette.highlight)
-    style_kool.TabSpecialBorderColorSide = Colors(style_kool.TabSpecialBorderColor())
-    style_kool.TabSpecialFontColor = Colors(palette.htext)
-    style_kool.TabUnselectedHoverBorderColorTop = Colors(palette.highlight)
-    style_kool.TabHoverBorderColorTop = Colors(palette.highlight)
-    style_kool.TabUnselectedHoverBorderColorSide = Colors(
-        [
-            Color(0.0, style_kool.BorderColor()),
-            Color(0.1, style_kool.BorderColor()),
-            Color(0.7, style_kool.TabHoverBorderColorTop()),
-            Color(1.0, style_kool.TabHoverBorderColorTop()),
-        ]
-    )
-    style_kool.TabHoverBorderColorSide = Colors(
-        [
-            Color(0.0, style_kool.BorderColor()),
-            Color(0.1, style_kool.BorderColor()),
-            Color(0.7, style_kool.TabHoverBorderColorTop()),
-            Color(1.0, style_kool.TabHoverBorderColorTop()),
-        ]
-    )
-    style_kool.PaneColor = Colors(
-        [
-            Color(0.0, _dimmed(palette.light, 0.1)),
-            Color(0.7, palette.light),
-            Color(1.0, palette.light),
-        ]
-    )
-    style_kool.TabSelectedColor = Colors(palette.light)
-    style_kool.TabUnselectedColor = Colors(
-        _lcomb(
-            style_kool.ToolbarBackgroundColor, style_kool.TabSelectedColor[0].value, 0.5
-        )
-    )
-    style_kool.SeparatorColor = Colors(
-        [
-            Color(0.0, QColor(QtCore.Qt.transparent)),
-            Color(0.05, QColor(QtCore.Qt.transparent)),
-            Color(0.1, style_kool.BorderColor()),
-            Color(0.9, style_kool.BorderColor()),
-            Color(0.95, QColor(QtCore.Qt.transparent)),
-            Color(1.0, QColor(QtCore.Qt.transparent)),
-        ]
-    )
-    style_kool.HorizontalFrameBackgroundColor = Colors(style_kool.PaneColor())
-    for c in style_kool.HorizontalFrameBackgroundColor:
-        c.value.setAlpha(100)
-    style_kool.HorizontalFrameBorderColor = Colors(style_kool.BorderColor())
-    style_kool.HorizontalFrameBorderSize = 2
-    style_kool.TabSpacing = 3
-    style_kool.HideArrowColor = Colors(_lcomb(palette.text, palette.midlight, 0.4))
-
-    vienna = (
-        QColor(51, 153, 255)
-        if palette.window.lightnessF() > 0.5
-        else QColor(25, 40, 70)
-    )
-    style_vienna = StyleParams()
-    style_vienna.UseTemplateSheet = True
-    style_vienna.AdditionalStyleSheet = ""
-    style_vienna.TabBorderRadius = 2
-    style_vienna.TabFontColor = Colors(_lcomb(palette.text, vienna, 0.588))
-    style_vienna.ToolbarBackgroundColor = Colors(
-        _add(_dimmed(palette.window, 0.07), _basecolor(_dimmed(vienna, 0.892)))
-    )
-    dim_coeff = 0.225 if palette.window.lightnessF() > 0.5 else 0.5
-    style_vienna.BorderColor = Colors(
-        _add(_dimmed(palette.window, dim_coeff), _basecolor(_dimmed(vienna, 0.838)))
-    )
-    style_vienna.GroupNameColor = Colors(
-        _lcomb(palette.text, style_vienna.ToolbarBackgroundColor, 0.484)
-    )
+def get_cachedstylesheet(style_name: str) -> Union[str, None]:
+    """Returns the stylesheet of `style_name` from the on-disk cache, if any."""
+    disk_key = _styles.disk_key(style_name)
+    if disk_key is None:
+        return None
+    return _styles.disk_cache.get(disk_key)  # type: ignore[union-attr]
 
-    style_vienna.PaneColor = Colors(
-        [
-            Color(0.0, style_vienna.ToolbarBackgroundColor),
-            Color(0.5, style_vienna.ToolbarBackgroundColor),
-            Color(
-                0.75, _lcomb(style_vienna.ToolbarBackgroundColor, palette.light, 0.5)
-            ),
-            Color(1.0, palette.light),
-        ]
-    )
 
-    style_vienna.TabSpecialColor = Colors(
-        [
-            Color(
-                0.0,
-                _add(
-                    _dimmed(palette.window, 0.7125),
-                    _coeff(
-                        _basecolor(_dimmed(palette.highlight, 0.294)), 1.0, 1.29, 1.0
-                    ),
-                ),
-            ),
-            Color(
-                0.6,
-                _add(
-                    _dimmed(palette.window, 0.891),
-                    _coeff(
-                        _basecolor(_dimmed(palette.highlight, 0.46)), 1.0, 0.69, 1.0
-                    ),
-                ),
-            ),
-            Color(
-                0.6001,
-                _add(
-                    _dimmed(palette.window, 0.825),
-                    _coeff(
-                        _basecolor(_dimmed(palette.highlight, 0.362)), 1.0, 0.815, 1.0
-                    ),
-                ),
-            ),
-            Color(
-                1.0,
-                _add(
-                    _dimmed(palette.window, 0.7125),
-                    _coeff(
-                        _basecolor(_dimmed(palette.highlight, 0.416)), 1.0, 0.924, 1.0
-                    ),
-                ),
-            ),
-        ]
-    )
+def store_cachedstylesheet(style: StyleSnapshot, sheet: str):
+    """Writes `sheet`, the stylesheet of `style`, to the on-disk cache."""
+    if not _styles.is_materialized(style):
+        return
+    disk_key = _styles.disk_key(style.name)
+    if disk_key is not None:
+        _styles.disk_cache.put(disk_key, sheet)  # type: ignore[union-attr]
 
-    style_vienna.TabSpecialHoverColor = Colors(
-        [
-            Color(
-                0.0, _coeff(style_vienna.TabSpecialColor[0].value, 2.17, 1.48, 1.197)
-            ),
-            Color(
-                0.6, _coeff(style_vienna.TabSpecialColor[1].value, 0.653, 1.218, 1.286)
-            ),
-            Color(
-                0.6001,
-                _coeff(style_vienna.TabSpecialColor[2].value, 1.69, 1.326, 1.191),
-            ),
-            Color(
-                1.0, _coeff(style_vienna.TabSpecialColor[3].value, 1.768, 1.44, 1.255)
-            ),
-        ]
-    )
 
-    style_vienna.TabSpecialHoverBorderColor = Colors(
-        _add(
-            _dimmed(palette.window, 0.729),
-            _coeff(_basecolor(_dimmed(palette.highlight, 0.392)), 1.0, 0.66, 1.0),
-        )
-    )
-    style_vienna.TabSpecialBorderColor = Colors(
-        _add(
-            _dimmed(palette.window, 0.729),
-            _coeff(_basecolor(_dimmed(palette.highlight, 0.392)), 1.0, 0.66, 1.0),
-        )
-    )
-    style_vienna.TabSpecialHoverBorderColorSide = Colors(
-        style_vienna.TabSpecialBorderColor()
-    )
-    style_vienna.TabSpecialBorderColorSide = Colors(
-        style_vienna.TabSpecialBorderColor()
-    )
-    style_vienna.TabSpecialFontColor = Colors(palette.htext)
-    style_vienna.TabUnselectedHoverBorderColorTop = Colors(QColor(255, 183, 0))
-    style_vienna.TabHoverBorderColorTop = Colors(QColor(255, 183, 0))
-
-    style_vienna.TabUnselectedHoverBorderColorSide = Colors(
-        [
-            Color(0.0, style_vienna.BorderColor()),
-            Color(0.3, QColor(255, 183, 0)),
-            Color(1.0, QColor(255, 183, 0)),
-        ]
-    )
-    style_vienna.TabHoverBorderColorSide = Colors(
-        style_vienna.TabUnselectedHoverBorderColorSide()
-    )
+def get_propertynames() -> FrozenSet[str]:
+    """Returns the names of the properties of StyleParams."""
+    return frozenset(get_styleproperties(StyleParams))
 
-    style_vienna.TabUnselectedColor = Colors(
-        _add(_dimmed(palette.window, 0.02), _basecolor(_dimmed(vienna, 0.9264)))
-    )
 
-    style_vienna.TabSelectedColor = Colors(palette.light)
+def _widget_screen(widget: QWidget) -> Union[QScreen, None]:
+    handle = widget.window().windowHandle()
+    if handle is not None:
+        return handle.screen()
+    # Not shown yet, go by the position and fall back to the primary screen.
+    pos = widget.mapToGlobal(QPoint(0, 0))
+    if _HAS_SCREENAT:
+        screen = QGuiApplication.screenAt(pos)
+    else:
+        screen_nbr = QApplication.desktop().screenNumber(pos)
+        screens = QGuiApplication.screens()
+        screen = screens[screen_nbr] if 0 <= screen_nbr < len(screens) else None
+    return screen or QGuiApplication.primaryScreen()
 
-    style_vienna.SeparatorColor = Colors(
-        [
-            Color(0.0, QtCore.Qt.transparent),
-            Color(0.075, QtCore.Qt.transparent),
-            Color(
-                0.0751,
-                _add(
-                    _dimmed(palette.window, 0.3125), _basecolor(_dimmed(vienna, 0.789))
-                ),
-            ),
-            Color(
-                0.925,
-                _add(
-                    _dimmed(palette.window, 0.3125), _basecolor(_dimmed(vienna, 0.789))
-                ),
-            ),
-            Color(0.9251, QtCore.Qt.transparent),
-            Color(1.0, QtCore.Qt.transparent),
-        ]
-    )
 
-    style_vienna.HorizontalFrameBackgroundColor = Colors(
-        [
-            Color(
+def get_scalefactor(widget: QWidget) -> float:
+    """Returns the DPI scale factor of the screen `widget` is shown on.
+
+    Factors are cached per screen until a screen is added or removed or
+    its DPI changes, see StyleNotifier.ScreensChanged.
+    """
+    return _styles.scalefactor(_widget_screen(widget))
+
+
+# The toolbar's own icon sizes, used instead of the ones of the style.
+_DEFAULT_PIXELMETRICS: Final[Dict[int, int]] = {
+    QStyle.PM_SmallIconSize: 16,
+    QStyle.PM_LargeIconSize: 32,
+}
+
+
+def get_pixelmetric(
+    metric: QStyle.PixelMetric, qstyle: Union[QStyle, None] = None
+) -> int:
+    """Returns the pixel metric `metric` of `qstyle` or the application style.
+
+    Metrics are queried without option or widget and cached per style
+    object until it is destroyed.
+    """
+    size = _DEFAULT_PIXELMETRICS.get(metric)
+    if size is not None:
+        return size
+    return _styles.pixelmetric(qstyle or QApplication.style(), metric)
+
+
+def clear_pixelmetrics():
+    _styles.clear_pixelmetrics()
+
+
+_TRANSPARENT = QtCore.Qt.transparent
+
+_KOOL_RULES = ThemeRules(
+    {
+        "UseTemplateSheet": True,
+        "AdditionalStyleSheet": "",
+        "TabBorderRadius": 0,
+        "TabFontColor": role("text"),
+        "ToolbarBackgroundColor": role("window"),
+        "BorderColor": dimmed(role("light"), 0.25),
+        "GroupNameColor": lcomb(role("text"), role("midlight"), 0.4),
+        "TabSpecialColor": [
+            (0.0, dimmed(role("highlight"), 0.2)),
+            (1.0, role("highlight")),
+        ],
+        "TabSpecialHoverColor": [
+            (0.0, role("highlight")),
+            (1.0, dimmed(role("highlight"), 0.2)),
+        ],
+        "TabSpecialHoverBorderColor": role("highlight"),
+        "TabSpecialHoverBorderColorSide": role("highlight"),
+        "TabSpecialBorderColor": role("highlight"),
+        "TabSpecialBorderColorSide": role("highlight"),
+        "TabSpecialFontColor": role("htext"),
+        "TabUnselectedHoverBorderColorTop": role("highlight"),
+        "TabHoverBorderColorTop": role("highlight"),
+        "TabUnselectedHoverBorderColorSide": [
+            (0.0, dimmed(role("light"), 0.25)),
+            (0.1, dimmed(role("light"), 0.25)),
+            (0.7, role("highlight")),
+            (1.0, role("highlight")),
+        ],
+        "TabHoverBorderColorSide": [
+            (0.0, dimmed(role("light"), 0.25)),
+            (0.1, dimmed(role("light"), 0.25)),
+            (0.7, role("highlight")),
+            (1.0, role("highlight")),
+        ],
+        "PaneColor": [
+            (0.0, dimmed(role("light"), 0.1)),
+            (0.7, role("light")),
+            (1.0, role("light")),
+        ],
+        "TabSelectedColor": role("light"),
+        "TabUnselectedColor": lcomb(role("window"), role("light"), 0.5),
+        "SeparatorColor": [
+            (0.0, _TRANSPARENT),
+            (0.05, _TRANSPARENT),
+            (0.1, dimmed(role("light"), 0.25)),
+            (0.9, dimmed(role("light"), 0.25)),
+            (0.95, _TRANSPARENT),
+            (1.0, _TRANSPARENT),
+        ],
+        "HorizontalFrameBackgroundColor": with_alpha(dimmed(role("light"), 0.1), 100),
+        "HorizontalFrameBorderColor": dimmed(role("light"), 0.25),
+        "HorizontalFrameBorderSize": 2,
+        "TabSpacing": 3,
+        "HideArrowColor": lcomb(role("text"), role("midlight"), 0.4),
+    }
+)
+
+_VIENNA = if_light("window", QColor(51, 153, 255), QColor(25, 40, 70))
+_VIENNA_BACKGROUND = add(
+    dimmed(role("window"), 0.07), basecolor(dimmed(_VIENNA, 0.892))
+)
+_VIENNA_BORDER = add(
+    if_light("window", dimmed(role("window"), 0.225), dimmed(role("window"), 0.5)),
+    basecolor(dimmed(_VIENNA, 0.838)),
+)
+_VIENNA_SPECIAL = [
+    (
+        0.0,
+        add(
+            dimmed(role("window"), 0.7125),
+            coeff(basecolor(dimmed(role("highlight"), 0.294)), 1.0, 1.29, 1.0),
+        ),
+    ),
+    (
+        0.6,
+        add(
+            dimmed(role("window"), 0.891),
+            coeff(basecolor(dimmed(role("highlight"), 0.46)), 1.0, 0.69, 1.0),
+        ),
+    ),
+    (
+        0.6001,
+        add(
+            dimmed(role("window"), 0.825),
+            coeff(basecolor(dimmed(role("highlight"), 0.362)), 1.0, 0.815, 1.0),
+        ),
+    ),
+    (
+        1.0,
+        add(
+            dimmed(role("window"), 0.7125),
+            coeff(basecolor(dimmed(role("highlight"), 0.416)), 1.0, 0.924, 1.0),
+        ),
+    ),
+]
+_VIENNA_SPECIAL_BORDER = add(
+    dimmed(role("window"), 0.729),
+    coeff(basecolor(dimmed(role("highlight"), 0.392)), 1.0, 0.66, 1.0),
+)
+_VIENNA_HOVER = QColor(255, 183, 0)
+_VIENNA_SEPARATOR = add(
+    dimmed(role("window"), 0.3125), basecolor(dimmed(_VIENNA, 0.789))
+)
+
+_VIENNA_RULES = ThemeRules(
+    {
+        "UseTemplateSheet": True,
+        "AdditionalStyleSheet": "",
+        "TabBorderRadius": 2,
+        "TabFontColor": lcomb(role("text"), _VIENNA, 0.588),
+        "ToolbarBackgroundColor": _VIENNA_BACKGROUND,
+        "BorderColor": _VIENNA_BORDER,
+        "GroupNameColor": lcomb(role("text"), _VIENNA_BACKGROUND, 0.484),
+        "PaneColor": [
+            (0.0, _VIENNA_BACKGROUND),
+            (0.5, _VIENNA_BACKGROUND),
+            (0.75, lcomb(_VIENNA_BACKGROUND, role("light"), 0.5)),
+            (1.0, role("light")),
+        ],
+        "TabSpecialColor": _VIENNA_SPECIAL,
+        "TabSpecialHoverColor": [
+            (0.0, coeff(_VIENNA_SPECIAL[0][1], 2.17, 1.48, 1.197)),
+            (0.6, coeff(_VIENNA_SPECIAL[1][1], 0.653, 1.218, 1.286)),
+            (0.6001, coeff(_VIENNA_SPECIAL[2][1], 1.69, 1.326, 1.191)),
+            (1.0, coeff(_VIENNA_SPECIAL[3][1], 1.768, 1.44, 1.255)),
+        ],
+        "TabSpecialHoverBorderColor": _VIENNA_SPECIAL_BORDER,
+        "TabSpecialBorderColor": _VIENNA_SPECIAL_BORDER,
+        "TabSpecialHoverBorderColorSide": _VIENNA_SPECIAL_BORDER,
+        "TabSpecialBorderColorSide": _VIENNA_SPECIAL_BORDER,
+        "TabSpecialFontColor": role("htext"),
+        "TabUnselectedHoverBorderColorTop": _VIENNA_HOVER,
+        "TabHoverBorderColorTop": _VIENNA_HOVER,
+        "TabUnselectedHoverBorderColorSide": [
+            (0.0, _VIENNA_BORDER),
+            (0.3, _VIENNA_HOVER),
+            (1.0, _VIENNA_HOVER),
+        ],
+        "TabHoverBorderColorSide": _VIENNA_BORDER,
+        "TabUnselectedColor": add(
+            dimmed(role("window"), 0.02), basecolor(dimmed(_VIENNA, 0.9264))
+        ),
+        "TabSelectedColor": role("light"),
+        "SeparatorColor": [
+            (0.0, _TRANSPARENT),
+            (0.075, _TRANSPARENT),
+            (0.0751, _VIENNA_SEPARATOR),
+            (0.925, _VIENNA_SEPARATOR),
+            (0.9251, _TRANSPARENT),
+            (1.0, _TRANSPARENT),
+        ],
+        "HorizontalFrameBackgroundColor": [
+            (
                 0.0,
-                _add(
-                    _dimmed(palette.window, 0.033),
-                    _coeff(_basecolor(_dimmed(vienna, 0.9362)), 1.0, 1.38, 1.0),
+                add(
+                    dimmed(role("window"), 0.033),
+                    coeff(basecolor(dimmed(_VIENNA, 0.9362)), 1.0, 1.38, 1.0),
                 ),
             ),
-            Color(
+            (
                 0.6,
-                _add(
-                    _dimmed(palette.window, 0.05),
-                    _coeff(_basecolor(_dimmed(vienna, 0.8333)), 1.0, 0.588, 1.0),
+                add(
+                    dimmed(role("window"), 0.05),
+                    coeff(basecolor(dimmed(_VIENNA, 0.8333)), 1.0, 0.588, 1.0),
                 ),
             ),
-            Color(
+            (
                 0.6001,
-                _add(
-                    palette.window,
-                    _coeff(_basecolor(_dimmed(vienna, 0.9166)), 1.0, 0.82, 1.0),
+                add(
+                    role("window"),
+                    coeff(basecolor(dimmed(_VIENNA, 0.9166)), 1.0, 0.82, 1.0),
                 ),
             ),
-            Color(1.0, palette.light),
-        ]
-    )
-
-    style_vienna.HorizontalFrameBorderColor = Colors(style_vienna.BorderColor())
-    style_vienna.HorizontalFrameBorderSize = 2
-    style_vienna.TabSpacing = 4
-    style_vienna.HideArrowColor = Colors(_lcomb(palette.text, palette.light, 0.62))
-
-    style_threshold = StyleParams()
-    style_threshold.UseTemplateSheet = True
-    style_threshold.AdditionalStyleSheet = ""
-    style_threshold.TabBorderRadius = 0
-    style_threshold.TabFontColor = Colors(palette.text)
-    style_threshold.ToolbarBackgroundColor = Colors(palette.light)
-    pane_dimmcoeff = 0.03529 if palette.window.lightnessF() > 0.5 else 0.1
-    style_threshold.PaneColor = Colors(_dimmed(palette.light, pane_dimmcoeff))
-    border_dimmcoeff = 0.15 if palette.window.lightnessF() > 0.5 else 0.3
-    style_threshold.BorderColor = Colors(
-        _dimmed(style_threshold.ToolbarBackgroundColor, border_dimmcoeff)
-    )
-    style_threshold.GroupNameColor = Colors(_lcomb(palette.text, palette.light, 0.43))
-
-    style_threshold.TabSpecialColor = Colors(_coeff(palette.highlight, 0.5, 0.8, 0.8))
-    style_threshold.TabSpecialHoverColor = Colors(
-        _coeff(palette.highlight, 0.8, 0.9, 0.88)
-    )
-    style_threshold.TabSpecialHoverBorderColor = Colors(
-        style_threshold.TabSpecialColor()
-    )
-    style_threshold.TabSpecialBorderColor = Colors(style_threshold.TabSpecialColor())
-    style_threshold.TabSpecialHoverBorderColorSide = Colors(
-        style_threshold.TabSpecialColor()
-    )
-    style_threshold.TabSpecialBorderColorSide = Colors(
-        style_threshold.TabSpecialColor()
-    )
-    style_threshold.TabSpecialFontColor = Colors(palette.htext)
-
-    style_threshold.TabUnselectedHoverBorderColorTop = Colors(
-        _dimmed(style_threshold.PaneColor, 0.04)
-    )
-    style_threshold.TabHoverBorderColorTop = Colors(style_threshold.BorderColor())
-    style_threshold.TabUnselectedHoverBorderColorSide = Colors(
-        style_threshold.TabUnselectedHoverBorderColorTop()
-    )
-
-    style_threshold.TabHoverBorderColorSide = Colors(style_threshold.BorderColor())
+            (1.0, role("light")),
+        ],
+        "HorizontalFrameBorderColor": _VIENNA_BORDER,
+        "HorizontalFrameBorderSize": 2,
+        "TabSpacing": 4,
+        "HideArrowColor": lcomb(role("text"), role("light"), 0.62),
+    }
+)
 
-    unselected_dimmcoeff = 0.008 if palette.window.lightnessF() > 0.5 else 0.1
-    style_threshold.TabUnselectedColor = Colors(
-        _dimmed(style_threshold.ToolbarBackgroundColor, unselected_dimmcoeff)
-    )
+_THRESHOLD_PANE = if_light(
+    "window", dimmed(role("light"), 0.03529), dimmed(role("light"), 0.1)
+)
+_THRESHOLD_BORDER = if_light(
+    "window", dimmed(role("light"), 0.15), dimmed(role("light"), 0.3)
+)
+_THRESHOLD_SPECIAL = coeff(role("highlight"), 0.5, 0.8, 0.8)
+
+_THRESHOLD_RULES = ThemeRules(
+    {
+        "UseTemplateSheet": True,
+        "AdditionalStyleSheet": "",
+        "TabBorderRadius": 0,
+        "TabFontColor": role("text"),
+        "ToolbarBackgroundColor": role("light"),
+        "PaneColor": _THRESHOLD_PANE,
+        "BorderColor": _THRESHOLD_BORDER,
+        "GroupNameColor": lcomb(role("text"), role("light"), 0.43),
+        "TabSpecialColor": _THRESHOLD_SPECIAL,
+        "TabSpecialHoverColor": coeff(role("highlight"), 0.8, 0.9, 0.88),
+        "TabSpecialHoverBorderColor": _THRESHOLD_SPECIAL,
+        "TabSpecialBorderColor": _THRESHOLD_SPECIAL,
+        "TabSpecialHoverBorderColorSide": _THRESHOLD_SPECIAL,
+        "TabSpecialBorderColorSide": _THRESHOLD_SPECIAL,
+        "TabSpecialFontColor": role("htext"),
+        "TabUnselectedHoverBorderColorTop": dimmed(_THRESHOLD_PANE, 0.04),
+        "TabHoverBorderColorTop": _THRESHOLD_BORDER,
+        "TabUnselectedHoverBorderColorSide": dimmed(_THRESHOLD_PANE, 0.04),
+        "TabHoverBorderColorSide": _THRESHOLD_BORDER,
+        "TabUnselectedColor": if_light(
+            "window", dimmed(role("light"), 0.008), dimmed(role("light"), 0.1)
+        ),
+        "TabSelectedColor": _THRESHOLD_PANE,
+        "SeparatorColor": [
+            (0.0, _TRANSPARENT),
+            (0.05, _TRANSPARENT),
+            (0.051, _THRESHOLD_BORDER),
+            (0.95, _THRESHOLD_BORDER),
+            (0.951, _TRANSPARENT),
+            (1.0, _TRANSPARENT),
+        ],
+        "HorizontalFrameBackgroundColor": _TRANSPARENT,
+        "HorizontalFrameBorderColor": _TRANSPARENT,
+        "HorizontalFrameBorderSize": 0,
+        "TabSpacing": 2,
+        "HideArrowColor": lcomb(role("text"), role("light"), 0.62),
+    }
+)
 
-    style_threshold.TabSelectedColor = Colors(style_threshold.PaneColor())
-
-    style_threshold.SeparatorColor = Colors(
-        [
-            Color(0.0, QtCore.Qt.transparent),
-            Color(0.05, QtCore.Qt.transparent),
-            Color(0.051, style_threshold.BorderColor()),
-            Color(0.95, style_threshold.BorderColor()),
-            Color(0.951, QtCore.Qt.transparent),
-            Color(1.0, QtCore.Qt.transparent),
-        ]
-    )
+_WHITEMERCY_BORDER = dimmed(_THRESHOLD_BORDER, 0.1)
+
+_WHITEMERCY_RULES = _THRESHOLD_RULES.derive(
+    TabUnselectedColor=_THRESHOLD_PANE,
+    PaneColor=role("light"),
+    TabSelectedColor=role("light"),
+    BorderColor=_WHITEMERCY_BORDER,
+    TabHoverBorderColorTop=_WHITEMERCY_BORDER,
+    TabHoverBorderColorSide=_WHITEMERCY_BORDER,
+    SeparatorColor=[
+        (0.0, _TRANSPARENT),
+        (0.05, _TRANSPARENT),
+        (0.051, _WHITEMERCY_BORDER),
+        (0.95, _WHITEMERCY_BORDER),
+        (0.951, _TRANSPARENT),
+        (1.0, _TRANSPARENT),
+    ],
+)
 
-    style_threshold.HorizontalFrameBackgroundColor = Colors(QtCore.Qt.transparent)
-
-    style_threshold.HorizontalFrameBorderColor = Colors(QtCore.Qt.transparent)
-    style_threshold.HorizontalFrameBorderSize = 0
-    style_threshold.TabSpacing = 2
-
-    style_threshold.HideArrowColor = Colors(_lcomb(palette.text, palette.light, 0.62))
-
-    register_style(STYLE_COOL, style_kool)
-    register_style(STYLE_VIENNA, style_vienna)
-    register_style(STYLE_THRESHOLD, style_threshold)
-
-    style_whitemercy: StyleParams = create_style(STYLE_THRESHOLD)
-    style_whitemercy.TabUnselectedColor = Colors(style_whitemercy.PaneColor())
-    style_whitemercy.PaneColor = Colors(style_whitemercy.ToolbarBackgroundColor())
-    style_whitemercy.TabSelectedColor = Colors(style_whitemercy.PaneColor())
-    style_whitemercy.BorderColor = Colors(_dimmed(style_whitemercy.BorderColor(), 0.1))
-    style_whitemercy.TabHoverBorderColorTop = Colors(style_whitemercy.BorderColor())
-    style_whitemercy.TabHoverBorderColorSide = Colors(style_whitemercy.BorderColor())
-    style_whitemercy.SeparatorColor = Colors(
-        [
-            Color(0.0, QtCore.Qt.transparent),
-            Color(0.05, QtCore.Qt.transparent),
-            Color(0.051, style_whitemercy.BorderColor()),
-            Color(0.95, style_whitemercy.BorderColor()),
-            Color(0.951, QtCore.Qt.transparent),
-            Color(1.0, QtCore.Qt.transparent),
-        ]
-    )
 
-    register_style(STYLE_WHITEMERCY, style_whitemercy)
+def register_default_styles():
+    """Registers the built-in styles.
+
+    Registration is cheap: each style is only built from the current
+    palette the first time it is requested, and rebuilt after the
+    application palette changes.
+    """
+    _styles.track_changes()
+    register_style(STYLE_COOL, _KOOL_RULES)
+    register_style(STYLE_VIENNA, _VIENNA_RULES)
+    register_style(STYLE_THRESHOLD, _THRESHOLD_RULES)
+    register_style(STYLE_WHITEMERCY, _WHITEMERCY_RULES)
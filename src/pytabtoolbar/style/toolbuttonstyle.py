@@ -1,7 +1,9 @@
-from typing import Optional, Union
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
 
 from PyQt5 import QtCore
-from PyQt5.QtGui import QIcon, QPainter, QPalette, QPixmap
+from PyQt5.QtGui import QGuiApplication, QIcon, QPainter, QPalette, QPixmap
 from PyQt5.QtWidgets import (
     QProxyStyle,
     QStyle,
@@ -13,6 +15,88 @@ from PyQt5.QtWidgets import (
 )
 
 
+@dataclass
+class PixmapCacheStats:
+    """Counters and memory use of the icon pixmap cache, sizes in bytes."""
+
+    hits: int = 0
+    misses: int = 0
+    entries: int = 0
+    size: int = 0
+    limit: int = 0
+
+
+class _PixmapCache:
+    """LRU of rendered icon pixmaps bounded by their total size in bytes."""
+
+    def __init__(self, limit: int = 8 * 1024 * 1024):
+        self.limit = limit
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._pixmaps: "OrderedDict[Tuple, Tuple[QPixmap, int]]" = OrderedDict()
+
+    def pixmap(
+        self, icon: QIcon, size: QtCore.QSize, mode: QIcon.Mode, state: QIcon.State
+    ) -> QPixmap:
+        # QIcon.pixmap renders for the application's device pixel ratio.
+        key = (
+            icon.cacheKey(),
+            size.width(),
+            size.height(),
+            int(mode),
+            int(state),
+            QGuiApplication.instance().devicePixelRatio(),
+        )
+        entry = self._pixmaps.get(key)
+        if entry is not None:
+            self.hits += 1
+            self._pixmaps.move_to_end(key)
+            return entry[0]
+
+        self.misses += 1
+        pm = icon.pixmap(size, mode, state)
+        nbytes = pm.width() * pm.height() * pm.depth() // 8
+        if nbytes <= self.limit:
+            self._pixmaps[key] = (pm, nbytes)
+            self.size += nbytes
+            while self.size > self.limit:
+                _, (_, dropped) = self._pixmaps.popitem(last=False)
+                self.size -= dropped
+        return pm
+
+    def set_limit(self, limit: int):
+        self.limit = limit
+        while self.size > self.limit:
+            _, (_, dropped) = self._pixmaps.popitem(last=False)
+            self.size -= dropped
+
+    def clear(self):
+        self._pixmaps.clear()
+        self.size = 0
+
+    def stats(self) -> PixmapCacheStats:
+        return PixmapCacheStats(
+            self.hits, self.misses, len(self._pixmaps), self.size, self.limit
+        )
+
+
+_pixmap_cache = _PixmapCache()
+
+
+def set_pixmapcache_limit(limit: int):
+    """Sets the memory budget in bytes of the icon pixmap cache."""
+    _pixmap_cache.set_limit(limit)
+
+
+def clear_pixmapcache():
+    _pixmap_cache.clear()
+
+
+def get_pixmapcache_stats() -> PixmapCacheStats:
+    return _pixmap_cache.stats()
+
+
 class TTToolButtonStyle(QProxyStyle):
     def __init__(self, parent, base_style: Optional[QProxyStyle] = None, *args):
         super().__init__(*args)
@@ -77,7 +161,8 @@ class TTToolButtonStyle(QProxyStyle):
                         mode = QIcon.Active
                     else:
                         mode = QIcon.Normal
-                    pm = toolbutton.icon.pixmap(  # type: ignore
+                    pm = _pixmap_cache.pixmap(
+                        toolbutton.icon,  # type: ignore
                         toolbutton.rect.size().boundedTo(toolbutton.iconSize),  # type: ignore
                         mode,
                         state,
@@ -1,6 +1,5 @@
 from dataclasses import dataclass
 from enum import Enum
-import math
 
 from typing import List, Union
 
@@ -19,8 +18,6 @@ from PyQt5.QtWidgets import (
     QWidget,
 )
 
-import pytabtoolbar.style as style
-
 import pytabtoolbar.tabtoolbar as tabtoolbar
 
 
@@ -62,8 +59,7 @@ class SubGroup(QFrame):
         parent_toolbar = tabtoolbar.find_tabtoolbar(self)
         if not parent_toolbar:
             raise Exception("Could not find Parent Tabtoolbar")
-        group_maxheight = parent_toolbar.group_maxheight
-        rowcount = parent_toolbar.rowcount()
+        row_height = parent_toolbar.get_metric(tabtoolbar.ToolbarMetric.RowHeight)
         frame = QFrame(self)
         frame.setFrameShape(QFrame.NoFrame)
         frame.setLineWidth(0)
@@ -72,7 +68,7 @@ class SubGroup(QFrame):
         policy.setHorizontalStretch(0)
         policy.setVerticalStretch(1)
         frame.setSizePolicy(policy)
-        frame.setMaximumHeight(math.ceil(group_maxheight / rowcount))
+        frame.setMaximumHeight(row_height)
         llayout = QHBoxLayout(frame)
         llayout.setContentsMargins(0, 0, 0, 0)
         llayout.setSpacing(spacing)
@@ -85,10 +81,6 @@ class SubGroup(QFrame):
     def add_action(
         self, type: QToolButton.ToolButtonPopupMode, action: QAction, menu: QMenu
     ):
-        iconsize = int(
-            style.get_pixelmetric(QStyle.PM_SmallIconSize) * style.get_scalefactor(self)
-        )
-
         frame = self.construct_innerframe(0)
         btn = QToolButton(self)
         btn.setProperty("TTInternal", QtCore.QVariant(True))
@@ -96,7 +88,7 @@ class SubGroup(QFrame):
         btn.setAutoRaise(True)
         btn.setDefaultAction(action)
         btn.setPopupMode(type)
-        btn.setIconSize(QtCore.QSize(iconsize, iconsize))
+        tabtoolbar.scale_icon(btn, QStyle.PM_SmallIconSize)
         if menu:
             btn.setMenu(menu)
         btn.setSizePolicy(QSizePolicy.Minimum, QSizePolicy.Preferred)
@@ -111,11 +103,11 @@ class SubGroup(QFrame):
         self.innerLayout.insertWidget(self.innerLayout.count() - 1, frame)
 
     def add_hbuttons(self, params: List[ActionParams]):
-        iconsize = int(
-            style.get_pixelmetric(QStyle.PM_SmallIconSize) * style.get_scalefactor(self)
-        )
         frame = self.construct_innerframe(0)
         frame.setProperty("TTHorizontalFrame", QtCore.QVariant(True))
+        parent_toolbar = tabtoolbar.find_tabtoolbar(self)
+        if parent_toolbar:
+            parent_toolbar.polish_scoped(frame)
         for param in params:
             btn = QToolButton(self)
             btn.setProperty("TTInternal", QtCore.QVariant(True))
@@ -123,7 +115,7 @@ class SubGroup(QFrame):
             btn.setAutoRaise(True)
             btn.setDefaultAction(param.action)
             btn.setPopupMode(param.type)
-            btn.setIconSize(QtCore.QSize(iconsize, iconsize))
+            tabtoolbar.scale_icon(btn, QStyle.PM_SmallIconSize)
             if param.menu:
                 btn.setMenu(param.menu)
             btn.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Preferred)
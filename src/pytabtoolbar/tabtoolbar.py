@@ -1,11 +1,30 @@
-from typing import Union
-from PyQt5 import QtCore, QtWidgets
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import Enum
+import math
+from typing import (
+    Callable,
+    Dict,
+    Final,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+from PyQt5 import QtCore, QtWidgets, sip
 from PyQt5.QtWidgets import (
     QAction,
+    QApplication,
     QBoxLayout,
     QFrame,
     QHBoxLayout,
+    QLabel,
     QSizePolicy,
+    QStyle,
     QTabWidget,
     QToolBar,
     QToolButton,
@@ -15,6 +34,33 @@ from PyQt5.QtWidgets import (
 import pytabtoolbar.page as page
 import pytabtoolbar.style as style
 
+# A sheet on the tab widget or on a page re-polishes nearly every widget of the
+# toolbar, so changes to these scopes are applied to the whole toolbar instead.
+_CONTAINER_SCOPES = frozenset({"TTWidget", "TTPage"})
+
+# QTabWidget.setTabVisible() needs Qt 5.15, before tabs are removed instead.
+_HAS_TABVISIBLE: Final[bool] = tuple(
+    int(part) for part in QtCore.QT_VERSION_STR.split(".")[:2]
+) >= (5, 15)
+
+# Toolbars inside a TabToolbar.batch_update() block.
+_batch_toolbars: List["TabToolbar"] = []
+
+
+class ToolbarMetric(Enum):
+    """Metrics of the toolbar layout that can be set with TabToolbar.set_metric."""
+
+    GroupHeight = 0
+    RowHeight = 1
+
+
+@dataclass
+class RestyleStats:
+    """How many restyles were requested by style events and how many ran."""
+
+    requested: int = 0
+    performed: int = 0
+
 
 class TabToolbar(QToolBar):
     """[summary]
@@ -29,7 +75,11 @@ class TabToolbar(QToolBar):
     Minimized = QtCore.pyqtSignal()
     Maximized = QtCore.pyqtSignal()
     SpecialTabClicked = QtCore.pyqtSignal()
-    StyleChanged = QtCore.pyqtSignal()
+    # The frozenset overload carries the names of the changed style properties.
+    StyleChanged = QtCore.pyqtSignal([], [frozenset])
+    Rescaled = QtCore.pyqtSignal(float)
+    # The new height of the toolbar while its pages are shown.
+    HeightChanged = QtCore.pyqtSignal(int)
 
     def __init__(
         self,
@@ -42,13 +92,46 @@ class TabToolbar(QToolBar):
         style.register_default_styles()
         self.group_rowcount = group_rowcount
         self.group_maxheight = group_maxheight
+        self._metrics: Dict[Union[int, ToolbarMetric], int] = {}
         self.has_specialtab = False
         self.current_index = 0
         self.ignore_styleevent = False
         self.is_shown = True
         self._is_minimized = False
         self.maxheight = QtWidgets.QWIDGETSIZE_MAX
-        self._style = style.StyleParams()
+        self._group_height = 0
+        self._height_inputs: Optional[Tuple[int, int, int, int]] = None
+        self._style: Union[style.StyleSnapshot, None] = None
+        self._stylename = ""
+        self._stylesheet = ""
+        self._incremental_restyle = False
+        self._animated_scrolling = False
+        self._kinetic_scrolling = False
+        self._deferred_pages: List[page.Page] = []
+        self._idle_prebuild = False
+        self._pages: List[page.Page] = []
+        self._page_positions: Dict[int, int] = {}
+        self._batch_depth = 0
+        self._batch_height = False
+        self._batch_style: Optional[str] = None
+        self._batch_polish: List[QWidget] = []
+        self._visited_pages: List[page.Page] = []
+        self._page_budget = 0
+        self._prebuild_timer = QtCore.QTimer(self)
+        self._prebuild_timer.setInterval(0)
+        self._prebuild_timer.timeout.connect(self._prebuild_next)
+        self._scoped_sheets: Dict[str, str] = {}
+        self._restyle_stats = RestyleStats()
+        self._restyle_timer = QtCore.QTimer(self)
+        self._restyle_timer.setSingleShot(True)
+        self._restyle_timer.setInterval(0)
+        self._restyle_timer.timeout.connect(self._deferred_restyle)
+        style.get_stylenotifier().StylesChanged.connect(self._styles_changed)
+        self._scalefactor = style.get_scalefactor(self)
+        self._window_handle = None
+        self._toolbutton_style: Union[style.TTToolButtonStyle, None] = None
+        self._toolbutton_style_base: Optional[QStyle] = None
+        style.get_stylenotifier().ScreensChanged.connect(self._rescale)
         self.setObjectName("TabToolbar")
 
         # self.tempShowTimer = QtCore.QTimer()
@@ -95,8 +178,14 @@ class TabToolbar(QToolBar):
         self.tabBar.tabBarDoubleClicked.connect(self.hideAction.trigger)
         self.tabBar.tabBarClicked.connect(self.current_tabchanged)
         self.tabBar.currentChanged.connect(self.focus_changed)
+        self.tabBar.currentChanged.connect(self._materialize_tab)
         self.cornerLayout.addWidget(self.hideButton)
         self.tabBar.setCornerWidget(self.cornerActions)
+
+        # Never shown, measures the height of the group names for the style.
+        self._groupname_probe = QLabel("X", self)
+        self._groupname_probe.setProperty("TTGroupName", QtCore.QVariant(True))
+        self._groupname_probe.hide()
         if not defaultstyle:
             defaultstyle = style.get_defaultstyle()
         self.set_style(defaultstyle)
@@ -113,14 +202,108 @@ class TabToolbar(QToolBar):
 
     def event(self, event: QtCore.QEvent):
 
-        if event.type() == QtCore.QEvent.StyleChange and not self.ignore_styleevent:
-            # TODO: Validatre if we need a timer
-            stylename = (
-                self._style.objectName() if self._style else style.get_defaultstyle()
+        if event.type() == QtCore.QEvent.StyleChange:
+            style.clear_pixelmetrics()
+        elif event.type() == QtCore.QEvent.ApplicationPaletteChange:
+            style.sync_palette()
+        if (
+            event.type()
+            in (
+                QtCore.QEvent.StyleChange,
+                QtCore.QEvent.PaletteChange,
+                QtCore.QEvent.ApplicationPaletteChange,
             )
-            self.set_style(stylename)
+            and not self.ignore_styleevent
+        ):
+            self.request_restyle()
+        elif event.type() == QtCore.QEvent.Show:
+            self._track_window()
+        elif event.type() == QtCore.QEvent.FontChange:
+            self.update_height()
         return super(TabToolbar, self).event(event)
 
+    def _track_window(self):
+        handle = self.window().windowHandle()
+        if handle is not None and handle is not self._window_handle:
+            handle.screenChanged.connect(self._rescale)
+            self._window_handle = handle
+        self._rescale()
+
+    @QtCore.pyqtSlot()
+    def _rescale(self):
+        factor = style.get_scalefactor(self)
+        if factor == self._scalefactor:
+            return
+        self._scalefactor = factor
+        self.setUpdatesEnabled(False)
+        try:
+            for button in self.findChildren(QToolButton):
+                metric = button.property("TTIconMetric")
+                if metric is not None:
+                    size = int(self.get_metric(metric) * factor)
+                    button.setIconSize(QtCore.QSize(size, size))
+            self.Rescaled.emit(factor)
+        finally:
+            self.setUpdatesEnabled(True)
+        self.update_height()
+
+    def toolbutton_style(self) -> style.TTToolButtonStyle:
+        """Returns the proxy style shared by the tool buttons of the toolbar."""
+        self._update_toolbuttonstyle()
+        return self._toolbutton_style  # type: ignore[return-value]
+
+    def _update_toolbuttonstyle(self):
+        # The proxy picks up the application style once, rebuild it if that
+        # style has been replaced since.
+        base = QApplication.style()
+        if self._toolbutton_style is not None and base is self._toolbutton_style_base:
+            return
+        old_style = self._toolbutton_style
+        self._toolbutton_style = style.TTToolButtonStyle(self)
+        self._toolbutton_style_base = base
+        base.destroyed.connect(self._toolbutton_base_destroyed)
+        if old_style is not None:
+            for button in self.findChildren(QToolButton):
+                if button.property("TTSharedStyle"):
+                    button.setStyle(self._toolbutton_style)
+            old_style.deleteLater()
+
+    @QtCore.pyqtSlot()
+    def _toolbutton_base_destroyed(self):
+        # A new application style may reuse the wrapper of the deleted one.
+        self._toolbutton_style_base = None
+
+    def scalefactor(self) -> float:
+        """The DPI scale factor of the screen the toolbar is shown on."""
+        return self._scalefactor
+
+    def request_restyle(self):
+        """Schedules a restyle with the current style.
+
+        All requests made before control returns to the event loop are
+        coalesced into a single restyle.
+        """
+        self._restyle_stats.requested += 1
+        self._restyle_timer.start()
+
+    def _deferred_restyle(self):
+        self._restyle_stats.performed += 1
+        self._update_toolbuttonstyle()
+        self.set_style(self._stylename or style.get_defaultstyle())
+
+    @QtCore.pyqtSlot(dict)
+    def _styles_changed(self, changes: Dict[str, FrozenSet[str]]):
+        if self._stylename in changes:
+            self.request_restyle()
+
+    def restyle_stats(self) -> RestyleStats:
+        return RestyleStats(
+            self._restyle_stats.requested, self._restyle_stats.performed
+        )
+
+    def reset_restylestats(self):
+        self._restyle_stats = RestyleStats()
+
     def focus_changed(self, old: QWidget = None, now: QWidget = None):
         if now and now != self:
             if self.isMinimized() and self.is_shown:
@@ -134,22 +317,224 @@ class TabToolbar(QToolBar):
     def rowcount(self):
         return self.group_rowcount
 
-    def group_maxheight(self):
-        return self.group_maxheight * style.get_scalefactor(self)
+    def set_metric(self, metric: Union[QStyle.PixelMetric, ToolbarMetric], value: int):
+        """Overrides a pixel metric or a ToolbarMetric for this toolbar only.
+
+        Overrides apply to pages, groups and buttons created afterwards.
+        """
+        if isinstance(metric, ToolbarMetric):
+            self._metrics[metric] = value
+            if metric == ToolbarMetric.GroupHeight:
+                self.group_maxheight = value
+                self.update_height()
+        else:
+            self._metrics[int(metric)] = value
+
+    def get_metric(self, metric: Union[QStyle.PixelMetric, ToolbarMetric]) -> int:
+        """Returns a pixel metric or a ToolbarMetric, unscaled.
+
+        Overrides come first, pixel metrics are taken from the cached
+        metrics of the toolbar's style.
+        """
+        key = metric if isinstance(metric, ToolbarMetric) else int(metric)
+        value = self._metrics.get(key)
+        if value is not None:
+            return value
+        elif metric == ToolbarMetric.GroupHeight:
+            return self.group_maxheight
+        elif metric == ToolbarMetric.RowHeight:
+            return math.ceil(self.group_maxheight / self.group_rowcount)
+        return style.get_pixelmetric(metric, self.style())
+
+    def group_height(self) -> int:
+        """The height of the groups, their rows and their name included."""
+        return self._group_height
+
+    def update_height(self):
+        """Recomputes the height of the toolbar from its metrics.
+
+        The height follows from the group height, the row count, the height
+        of the group names and the height of the tab bar. It is only applied,
+        and HeightChanged emitted, when the result changes.
+        """
+        if self._batch_depth:
+            self._batch_height = True
+            return
+        self._groupname_probe.ensurePolished()
+        inputs = (
+            self.group_maxheight,
+            self.group_rowcount,
+            self._groupname_probe.sizeHint().height(),
+            self.tabBar.tabBar().sizeHint().height(),
+        )
+        if inputs == self._height_inputs:
+            return
+        self._height_inputs = inputs
+        group_maxheight, rowcount, name_height, tab_height = inputs
+        group_height = group_maxheight + name_height + rowcount - 1
+        maxheight = group_height + tab_height + 6
+        if (group_height, maxheight) == (self._group_height, self.maxheight):
+            return
+        self._group_height = group_height
+        self.maxheight = maxheight
+        if self.is_shown:
+            self.setMaximumHeight(maxheight)
+            self.setMinimumHeight(maxheight)
+        self.HeightChanged.emit(maxheight)
+
+    def set_incrementalrestyle(self, enabled: bool):
+        """Restyles only the widgets affected by a style change.
+
+        Instead of replacing the stylesheet of the whole toolbar, which
+        re-polishes every descendant, the rules that use a changed property
+        are applied as scoped sheets to the widgets they select, e.g. the
+        tab bar or the separators. Changes to rules that cannot be scoped
+        still restyle the whole toolbar.
+        """
+        self._incremental_restyle = enabled
+
+    def set_animatedscrolling(self, enabled: bool):
+        """Scrolls the pages smoothly instead of in steps on wheel events."""
+        self._animated_scrolling = enabled
+        for scroller in self.findChildren(page.TTScroller):
+            scroller.set_animated(enabled)
+
+    def set_kineticscrolling(self, enabled: bool):
+        """Lets the pages be flicked with touch gestures."""
+        self._kinetic_scrolling = enabled
+        for scroller in self.findChildren(page.TTScroller):
+            scroller.set_kinetic(enabled)
+
+    @contextmanager
+    def batch_update(self) -> Iterator["TabToolbar"]:
+        """Groups changes to the toolbar into a single update.
+
+        Inside the `with` block repaints and the toolbar's layout are
+        suspended, while style changes, the polishing of new pages and the
+        height of the toolbar are only recorded. They are applied once
+        when the outermost block exits::
+
+            with toolbar.batch_update():
+                page = toolbar.add_page("Home")
+                ...
+        """
+        self._batch_depth += 1
+        if self._batch_depth == 1:
+            self.setUpdatesEnabled(False)
+            self.layout().setEnabled(False)
+            _batch_toolbars.append(self)
+        try:
+            yield self
+        finally:
+            self._batch_depth -= 1
+            if self._batch_depth == 0:
+                self._end_batch()
+
+    def _end_batch(self):
+        _batch_toolbars.remove(self)
+        try:
+            stylename, self._batch_style = self._batch_style, None
+            if stylename is not None:
+                self.set_style(stylename)
+            widgets, self._batch_polish = self._batch_polish, []
+            for widget in widgets:
+                if not sip.isdeleted(widget):
+                    self.polish_scoped(widget)
+            update_height, self._batch_height = self._batch_height, False
+            if update_height:
+                self.update_height()
+        finally:
+            self.layout().setEnabled(True)
+            self.layout().invalidate()
+            self.setUpdatesEnabled(True)
 
     def set_style(self, stylename: str):
+        if self._batch_depth:
+            self._batch_style = stylename
+            return
+        # Applies the current state, so a pending restyle would be redundant.
+        self._restyle_timer.stop()
         self.ignore_styleevent = True
-        self._style = style.create_style(stylename)
-        stylesheet = style.get_stylesheet(self._style)
-        self.setStyleSheet(stylesheet)
-        self.ignore_styleevent = False
+        try:
+            changed = self._apply_style(stylename)
+        finally:
+            self.ignore_styleevent = False
 
+        self.update_height()
         self.StyleChanged.emit()
+        self.StyleChanged[frozenset].emit(changed)
+
+    def _apply_style(self, stylename: str) -> FrozenSet[str]:
+        starting = self._style is None and not self._stylesheet
+        if starting:
+            # Nothing applied yet, a cached sheet spares deriving the style.
+            stylesheet = style.get_cachedstylesheet(stylename)
+            if stylesheet is not None:
+                self._stylename = stylename
+                self.setStyleSheet(stylesheet)
+                self._stylesheet = stylesheet
+                return style.get_propertynames()
+
+        snapshot = style.get_stylesnapshot(stylename)
+        if snapshot is None:
+            changed: FrozenSet[str] = frozenset()
+        elif self._style is None:
+            changed = frozenset(name for name, _ in snapshot.items())
+        else:
+            changed = frozenset(style.changed_properties(self._style, snapshot))
+        scopes = None
+        if self._incremental_restyle and self._style is not None:
+            scopes = style.get_stylescopes(snapshot, changed)
+            if style.SCOPE_TOOLBAR in scopes or scopes & _CONTAINER_SCOPES:
+                scopes = None
+        self._style = snapshot
+        self._stylename = snapshot.name if snapshot else ""
+        if scopes is None:
+            self._restyle_full()
+            if starting and snapshot is not None:
+                # The sheet a later process starts with, see get_cachedstylesheet.
+                style.store_cachedstylesheet(snapshot, self._stylesheet)
+        elif scopes:
+            self._restyle_scopes(scopes)
+        return changed
+
+    def _restyle_full(self):
+        if self._scoped_sheets:
+            for widgets in self._scoped_widgets(self._scoped_sheets).values():
+                for widget in widgets:
+                    widget.setStyleSheet("")
+            self._scoped_sheets = {}
+        stylesheet = style.get_stylesheet(self._style)
+        if stylesheet != self._stylesheet:
+            self.setStyleSheet(stylesheet)
+            self._stylesheet = stylesheet
+
+    def _restyle_scopes(self, scopes: Set[str]):
+        for scope, widgets in self._scoped_widgets(scopes).items():
+            stylesheet = style.get_scopedsheet(self._style, scope)
+            self._scoped_sheets[scope] = stylesheet
+            for widget in widgets:
+                widget.setStyleSheet(stylesheet)
+
+    def _scoped_widgets(self, scopes: Iterable[str]) -> Dict[str, List[QWidget]]:
+        widgets: Dict[str, List[QWidget]] = {scope: [] for scope in scopes}
+        for widget in self.findChildren(QWidget):
+            for scope, scoped in widgets.items():
+                if widget.property(scope):
+                    scoped.append(widget)
+        return widgets
+
+    def polish_scoped(self, widget: QWidget):
+        """Applies the current scoped sheets to a newly created widget."""
+        if self._batch_depth:
+            self._batch_polish.append(widget)
+            return
+        for scope, stylesheet in self._scoped_sheets.items():
+            if widget.property(scope):
+                widget.setStyleSheet(stylesheet)
 
     def get_style(self) -> str:
-        if self._style:
-            return self._style.objectName()
-        return ""
+        return self._stylename
 
     def add_corneraction(self, action: QAction):
         action_button = QToolButton(self.tabBar)
@@ -214,40 +599,215 @@ class TabToolbar(QToolBar):
             self.is_shown = True
 
     def hide_tab(self, index: int):
-        page = self.sender()
-        QtCore.QSignalBlocker(page)
-        for i in range(self.tabBar.count()):
-            if self.tabBar.widget(i) == page:
-                self.tabBar.removeTab(i)
-                return
-        self.current_index = self.tabBar.currentIndex()
-
-    @QtCore.pyqtSlot(int)
-    def _adjustverticalsize(self, vsize: int):
-        self.maxheight = vsize + self.tabBar.tabBar().height() + 6
-        self.setMaximumHeight(self.maxheight)
-        self.setMinimumHeight(self.maxheight)
-
-    def adjust_verticalsize(self, vsize: int):
-        QtCore.QTimer.singleShot(0, lambda: self._adjustverticalsize(vsize))  # type: ignore[attr-defined]
-        # self._AdjustVerticleSize(vSize)
+        self.set_tabsvisible({index: False})
 
     def show_tab(self, index: int):
-        tab_page = self.sender()
-        QtCore.QSignalBlocker(tab_page)
-        self.tabBar.insertTab(index, tab_page, tab_page.objectName())
+        self.set_tabsvisible({index: True})
+
+    def get_page(self, page_id: int) -> page.Page:
+        """The page with the id `page_id`, see Page.myIndex."""
+        return self._pages[page_id]
+
+    def page_position(self, page_id: int) -> int:
+        """The tab index of the page `page_id`, or -1 if its tab is hidden."""
+        return self._page_positions.get(page_id, -1)
+
+    def set_tabsvisible(self, visibility: Dict[int, bool]):
+        """Shows or hides the tabs of several pages at once.
+
+        `visibility` maps page ids to whether their tab should be shown.
+        Tabs keep the order in which their pages were added. The tab bar is
+        repainted once for all changes. With Qt 5.15 and later hidden tabs
+        stay in the tab bar, so the tab index of a page is its id.
+        """
+        changes = {
+            page_id: visible
+            for page_id, visible in visibility.items()
+            if visible != (page_id in self._page_positions)
+        }
+        if not changes:
+            return
+        current = self.tabBar.currentWidget()
+        self.tabBar.setUpdatesEnabled(False)
+        blocker = QtCore.QSignalBlocker(self.tabBar)
+        try:
+            if _HAS_TABVISIBLE:
+                self._set_tabsvisible(changes)
+            else:
+                self._move_tabs(changes)
+            if self.tabBar.currentIndex() == 0 and self.has_specialtab:
+                # Never leave the special tab current while a page is shown.
+                positions = [pos for pos in self._page_positions.values() if pos > 0]
+                if positions:
+                    self.tabBar.setCurrentIndex(min(positions))
+        finally:
+            blocker.unblock()
+            self.tabBar.setUpdatesEnabled(True)
+        self.update_height()
         self.current_index = self.tabBar.currentIndex()
+        if self.tabBar.currentWidget() is not current:
+            self.tabBar.currentChanged.emit(self.current_index)
+
+    def adjust_verticalsize(self, vsize: int):
+        # The height no longer follows the groups, kept for compatibility.
+        self.update_height()
 
-    def add_page(self, page_name: str) -> page.Page:
-        tab_page = page.Page(self.tabBar.count(), page_name)
-        QtCore.QSignalBlocker(tab_page)
+    def add_page(
+        self,
+        page_name: str,
+        builder: Optional[Callable[[page.Page], None]] = None,
+    ) -> page.Page:
+        """Adds a page, deferred until its tab is first shown if `builder` is set."""
+        page_id = len(self._pages)
+        tab_page = page.Page(page_id, page_name, builder=builder)
+        self._pages.append(tab_page)
+        self._page_positions[page_id] = self.tabBar.count()
         tab_page.Hiding.connect(self.hide_tab)
         tab_page.Showing.connect(self.show_tab)
+        if tab_page.is_materialized():
+            self._setup_page(tab_page)
+        else:
+            tab_page.Materialized.connect(self._page_materialized)
+            self._deferred_pages.append(tab_page)
+            if self._idle_prebuild:
+                self._prebuild_timer.start()
         self.tabBar.addTab(tab_page, page_name)
+        self.update_height()
         return tab_page
 
+    def _setup_page(self, tab_page: page.Page):
+        tab_page.scroller.set_animated(self._animated_scrolling)
+        tab_page.scroller.set_kinetic(self._kinetic_scrolling)
+        self.polish_scoped(tab_page.inner_area)
+
+    @QtCore.pyqtSlot()
+    def _page_materialized(self):
+        tab_page = self.sender()
+        if tab_page in self._deferred_pages:
+            self._deferred_pages.remove(tab_page)
+        self._setup_page(tab_page)
+
+    def _set_tabsvisible(self, changes: Dict[int, bool]):
+        for page_id, visible in changes.items():
+            self.tabBar.setTabVisible(page_id, visible)
+            if visible:
+                self._page_positions[page_id] = page_id
+            else:
+                del self._page_positions[page_id]
+
+    def _move_tabs(self, changes: Dict[int, bool]):
+        position = 0
+        for page_id, tab_page in enumerate(self._pages):
+            visible = changes.get(page_id)
+            if visible is None:
+                if page_id in self._page_positions:
+                    self._page_positions[page_id] = position
+                    position += 1
+            elif visible:
+                self.tabBar.insertTab(position, tab_page, tab_page.objectName())
+                self._page_positions[page_id] = position
+                position += 1
+            else:
+                self.tabBar.removeTab(position)
+                del self._page_positions[page_id]
+
+    @QtCore.pyqtSlot(int)
+    def _materialize_tab(self, index: int):
+        tab_page = self.tabBar.widget(index)
+        if isinstance(tab_page, page.Page):
+            with self.batch_update():
+                tab_page.materialize()
+            if tab_page in self._visited_pages:
+                self._visited_pages.remove(tab_page)
+            self._visited_pages.append(tab_page)
+            self._enforce_pagebudget()
+
+    def set_pagebudget(self, widgets: int):
+        """Limits the live widgets of the pages to about `widgets`.
+
+        When the pages hold more widgets, the pages that can be rebuilt are
+        unloaded, starting with those not visited for the longest time. The
+        current page is always kept. A budget of 0 disables the limit.
+        """
+        self._page_budget = widgets
+        self._enforce_pagebudget()
+
+    def _enforce_pagebudget(self):
+        if not self._page_budget:
+            return
+        counts = {p: p.widget_count() for p in self._pages if p.is_materialized()}
+        total = sum(counts.values())
+        current = self.tabBar.currentWidget()
+        # Pages that were only prebuilt go first, then the least recently visited.
+        candidates = [p for p in counts if p not in self._visited_pages]
+        candidates.extend(self._visited_pages)
+        for candidate in candidates:
+            if total <= self._page_budget:
+                break
+            if candidate is not current and candidate.unload():
+                total -= counts[candidate]
+                if candidate in self._visited_pages:
+                    self._visited_pages.remove(candidate)
+
+    def page_stats(self) -> List[page.PageStats]:
+        """The widget counts and build statistics of all pages."""
+        return [tab_page.stats() for tab_page in self._pages]
+
+    def set_idleprebuild(self, enabled: bool):
+        """Materializes the deferred pages one by one while the app is idle."""
+        self._idle_prebuild = enabled
+        if enabled and self._deferred_pages:
+            self._prebuild_timer.start()
+        else:
+            self._prebuild_timer.stop()
+
+    @QtCore.pyqtSlot()
+    def _prebuild_next(self):
+        if self._page_budget and self._page_budget <= sum(
+            p.widget_count() for p in self._pages if p.is_materialized()
+        ):
+            # Prebuilt pages would only be unloaded again.
+            self._prebuild_timer.stop()
+            return
+        if self._deferred_pages:
+            with self.batch_update():
+                self._deferred_pages[0].materialize()
+        if not self._deferred_pages:
+            self._prebuild_timer.stop()
+
+
+def scale_icon(button: QToolButton, metric: QStyle.PixelMetric) -> int:
+    """Sets the icon size of `button` to the scaled pixel metric `metric`.
+
+    The icon is resized with the other buttons of its toolbar when the
+    toolbar moves to a screen with a different DPI. Returns the size.
+    """
+    toolbar = find_tabtoolbar(button)
+    if toolbar:
+        size = int(toolbar.get_metric(metric) * toolbar.scalefactor())
+    else:
+        size = int(style.get_pixelmetric(metric) * style.get_scalefactor(button))
+    button.setProperty("TTIconMetric", QtCore.QVariant(int(metric)))
+    button.setIconSize(QtCore.QSize(size, size))
+    return size
+
+
+def apply_toolbuttonstyle(button: QToolButton):
+    """Lets `button` paint with the TTToolButtonStyle shared by its toolbar."""
+    toolbar = find_tabtoolbar(button)
+    if toolbar:
+        button.setProperty("TTSharedStyle", QtCore.QVariant(True))
+        button.setStyle(toolbar.toolbutton_style())
+    else:
+        button.setStyle(style.TTToolButtonStyle(button))
+
 
 def find_tabtoolbar(starting_widget: QWidget) -> Union[TabToolbar, None]:
+    # Widgets created in a batch update mostly belong to its toolbar, and
+    # isAncestorOf walks the parents without leaving C++.
+    for toolbar in _batch_toolbars:
+        if toolbar is starting_widget or toolbar.isAncestorOf(starting_widget):
+            return toolbar
     par = starting_widget
     while par:
         if isinstance(par, TabToolbar):
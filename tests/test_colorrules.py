@@ -0,0 +1,29 @@
+from PyQt5.QtGui import QColor, QPalette
+import pytest
+
+from pytabtoolbar.style import colorrules
+from pytabtoolbar.style.toolbarstyles import (
+    _KOOL_RULES,
+    _THRESHOLD_RULES,
+    _VIENNA_RULES,
+    _WHITEMERCY_RULES,
+    TPalette,
+)
+
+
+@pytest.mark.parametrize(
+    "window, highlight",
+    [("#efefef", "#308cc6"), ("#2b2b2b", "#ff7f00"), ("#ffffff", "#000000")],
+)
+def test_numpy_evaluation_matches_python(qapp, monkeypatch, window, highlight):
+    pytest.importorskip("numpy")
+    palette = QPalette(QColor(window))
+    palette.setColor(QPalette.Highlight, QColor(highlight))
+    roles = TPalette(palette).roles()
+    program = colorrules._compile_program(
+        (_KOOL_RULES, _VIENNA_RULES, _THRESHOLD_RULES, _WHITEMERCY_RULES)
+    )
+    monkeypatch.setattr(colorrules, "_NUMPY_MIN_RULES", 0)
+    with_numpy = program.evaluate(roles)
+    monkeypatch.setattr(colorrules, "np", None)
+    assert with_numpy == program.evaluate(roles)
@@ -0,0 +1,35 @@
+from PyQt5 import QtCore
+from PyQt5.QtWidgets import QAction, QMainWindow, QMenu, QToolButton
+
+from pytabtoolbar import TabToolbar
+from pytabtoolbar import _compacttoolbutton
+from pytabtoolbar._compacttoolbutton import _CompactToolButton
+
+
+def test_sizehint_follows_label_and_iconsize(qapp):
+    window = QMainWindow()
+    toolbar = TabToolbar(window)
+    window.addToolBar(toolbar)
+    action = QAction("Split", window)
+    group = toolbar.add_page("Home").add_group("Group")
+    group.add_action(QToolButton.MenuButtonPopup, action, QMenu(window))
+    button = toolbar.findChild(_CompactToolButton)
+    hint = button.sizeHint()
+
+    action.setText("A much longer label")
+    assert button.label == "A much longer label"
+    assert button.sizeHint().width() > hint.width()
+
+    button.setIconSize(button.iconSize() + QtCore.QSize(16, 16))
+    assert button.sizeHint().height() > hint.height()
+    window.deleteLater()
+
+
+def test_sizehint_without_horizontaladvance(qapp, monkeypatch):
+    window = QMainWindow()
+    menu = QMenu(window)
+    hint = _CompactToolButton(QAction("Split", window), menu, window).sizeHint()
+    monkeypatch.setattr(_compacttoolbutton, "_HAS_HORIZONTALADVANCE", False)
+    button = _CompactToolButton(QAction("Split", window), menu, window)
+    assert button.sizeHint() == hint
+    window.deleteLater()
@@ -0,0 +1,113 @@
+from PyQt5 import QtCore
+from PyQt5.QtGui import QWheelEvent
+from PyQt5.QtWidgets import (
+    QAction,
+    QApplication,
+    QMainWindow,
+    QMenu,
+    QScrollArea,
+    QToolButton,
+    QWidget,
+)
+
+from pytabtoolbar import TabToolbar
+from pytabtoolbar.page import TTScroller
+
+
+def test_unload_disconnects_splitbutton_menu(qapp):
+    window = QMainWindow()
+    toolbar = TabToolbar(window)
+    window.addToolBar(toolbar)
+    # Like the Builder's menus, the menu outlives the pages using it.
+    menu = QMenu(window)
+
+    def build(page):
+        group = page.add_group("Group")
+        group.add_action(QToolButton.MenuButtonPopup, QAction("Split", window), menu)
+
+    toolbar.add_page("Home")
+    lazy_page = toolbar.add_page("Lazy", build)
+    receivers = menu.receivers(menu.aboutToHide)
+
+    lazy_page.materialize()
+    assert menu.receivers(menu.aboutToHide) == receivers + 1
+
+    assert lazy_page.unload()
+    QtCore.QCoreApplication.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+    assert menu.receivers(menu.aboutToHide) == receivers
+    # Used to call into the deleted button and abort.
+    menu.aboutToHide.emit()
+
+    lazy_page.materialize()
+    assert menu.receivers(menu.aboutToHide) == receivers + 1
+    window.deleteLater()
+
+
+def _wheel(widget: QWidget, pixels: QtCore.QPoint, angle: QtCore.QPoint):
+    position = QtCore.QPointF(1, 1)
+    event = QWheelEvent(
+        position,
+        position,
+        pixels,
+        angle,
+        QtCore.Qt.NoButton,
+        QtCore.Qt.NoModifier,
+        QtCore.Qt.NoScrollPhase,
+        False,
+    )
+    QApplication.sendEvent(widget, event)
+
+
+def test_scroller_scrolls_by_wheel_and_pixel_delta(qapp):
+    area = QScrollArea()
+    content = QWidget()
+    content.setFixedSize(3000, 50)
+    area.setWidget(content)
+    TTScroller(area)
+    scrollbar = area.horizontalScrollBar()
+    scrollbar.setValue(500)
+
+    # A wheel notch of 120 scrolls 24 pixels, fractions are carried over.
+    _wheel(area.viewport(), QtCore.QPoint(), QtCore.QPoint(0, -120))
+    assert scrollbar.value() == 524
+    for _ in range(5):
+        _wheel(area.viewport(), QtCore.QPoint(), QtCore.QPoint(0, 1))
+    assert scrollbar.value() == 523
+
+    # Touchpads report pixels, which take precedence over the angle.
+    _wheel(area, QtCore.QPoint(0, 7), QtCore.QPoint(0, 120))
+    assert scrollbar.value() == 516
+    _wheel(area, QtCore.QPoint(-9, 0), QtCore.QPoint(-120, 0))
+    assert scrollbar.value() == 525
+    area.deleteLater()
+
+
+def test_widget_count_is_cached_until_the_page_changes(qapp, monkeypatch):
+    toolbar = TabToolbar()
+    toolbar.add_page("Home")
+    groups = []
+    tab_page = toolbar.add_page("Lazy", lambda page: groups.append(page.add_group("A")))
+    assert tab_page.widget_count() == 0
+
+    tab_page.materialize()
+    count = tab_page.widget_count()
+    assert count > 0
+    counted = []
+    find_children = tab_page.findChildren
+    monkeypatch.setattr(
+        tab_page,
+        "findChildren",
+        lambda *args: counted.append(1) or find_children(*args),
+    )
+    assert tab_page.widget_count() == count
+    assert counted == []
+
+    groups[0].add_action(QToolButton.InstantPopup, QAction("Action", toolbar), None)
+    QApplication.sendPostedEvents(None, QtCore.QEvent.LayoutRequest)
+    assert tab_page.widget_count() > count
+    assert len(counted) == 1
+
+    assert tab_page.unload()
+    assert tab_page.widget_count() == 0
+    assert len(counted) == 1
+    toolbar.deleteLater()
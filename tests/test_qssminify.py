@@ -0,0 +1,37 @@
+from pytabtoolbar.style.qssminify import minify
+
+
+def test_single_color_gradients_become_colors():
+    sheet = (
+        "QWidget { background: qlineargradient(x1:0, y1:1, x2:0, y2:0,"
+        " stop:0 rgba(1, 2, 3, 255), stop:1 rgba(1,2,3,255)); }"
+        "QLabel { background: qlineargradient(x1:0, y1:1, x2:0, y2:0,"
+        " stop:0 palette(window), stop:1 palette(window)); }"
+    )
+    assert minify(sheet) == (
+        "QWidget{background:rgba(1,2,3,255)}QLabel{background:palette(window)}"
+    )
+
+
+def test_gradients_with_different_or_unknown_stops_are_kept():
+    palettes = (
+        "qlineargradient(x1:0,y1:1,x2:0,y2:0,"
+        "stop:0 palette(window),stop:1 palette(base))"
+    )
+    assert minify("QLabel { background: %s; }" % palettes) == (
+        "QLabel{background:%s}" % palettes
+    )
+    unknown = "qlineargradient(x1:0,y1:1,x2:0,y2:0,stop:0 #fff,stop:1e-1 #000)"
+    assert minify("QLabel { background: %s; }" % unknown) == (
+        "QLabel{background:%s}" % unknown
+    )
+
+
+def test_merging_keeps_the_cascade_order():
+    assert minify("A { color: red; } B { border: 0; } A { margin: 0; }") == (
+        "B{border:0}A{color:red;margin:0}"
+    )
+    # B overrides the color of the first A for widgets matched by both.
+    assert minify("A { color: red; } B { color: blue; } A { margin: 0; }") == (
+        "A{color:red}B{color:blue}A{margin:0}"
+    )
@@ -0,0 +1,245 @@
+import os
+
+from PyQt5.QtGui import QColor, QPalette
+import pytest
+
+from pytabtoolbar import TabToolbar, get_styles, set_stylesheet_cachedir
+from pytabtoolbar.style import (
+    create_style,
+    get_propertynames,
+    get_stylenotifier,
+    get_stylesheet,
+    get_stylesnapshot,
+    regenerate_styles,
+    register_default_styles,
+    register_style,
+)
+from pytabtoolbar.style import toolbarstyles
+from pytabtoolbar.style.toolbarstyles import (
+    _KOOL_RULES,
+    _CompiledTemplate,
+    _DiskCache,
+    _Styles,
+    unregister_style,
+)
+
+
+def test_compiled_template_fills_known_placeholders():
+    template = _CompiledTemplate("a { color: %X%; } b { %Unknown%: %X%; }")
+    assert template.placeholders == ("X", "Unknown")
+    assert template.render({"X": "red"}) == "a { color: red; } b { %Unknown%: red; }"
+    assert _CompiledTemplate("a { }").render({"X": "red"}) == "a { }"
+
+
+def test_stylesheet_fills_template_and_additional_sheet(qapp):
+    register_default_styles()
+    params = create_style("Kool")
+    params.TabSpacing = 7
+    params.AdditionalStyleSheet = "QLabel { margin: %TabSpacing%; }"
+    sheet = get_stylesheet(params)
+    assert sheet.endswith("QLabel { margin: 7; }")
+    for name in get_propertynames():
+        assert "%{}%".format(name) not in sheet
+
+
+def test_stylesheet_cachedir_keeps_startup_sheets(qapp, tmp_path):
+    register_default_styles()
+    set_stylesheet_cachedir(str(tmp_path), maxsize=2)
+    try:
+        styles = [name for name in get_styles() if name != "NoStyle"]
+        toolbar = TabToolbar(defaultstyle=styles[0])
+        assert len(list(tmp_path.glob("*.qss"))) == 1
+
+        # Restyling a running toolbar does not write to the cache.
+        for name in styles[1:]:
+            toolbar.set_style(name)
+        assert len(list(tmp_path.glob("*.qss"))) == 1
+
+        for name in styles[1:]:
+            TabToolbar(defaultstyle=name).deleteLater()
+        assert len(list(tmp_path.glob("*.qss"))) == 2
+    finally:
+        set_stylesheet_cachedir(None)
+
+
+def test_stylesheet_is_cached_and_not_reapplied(qapp, monkeypatch):
+    register_default_styles()
+    assert get_stylesheet("Kool") is get_stylesheet("Kool")
+    assert get_stylesheet(create_style("Kool")) is get_stylesheet("Kool")
+
+    toolbar = TabToolbar(defaultstyle="Kool")
+    applied = []
+    monkeypatch.setattr(toolbar, "setStyleSheet", applied.append)
+    toolbar.set_style("Kool")
+    assert applied == []
+    toolbar.set_style("Vienna")
+    assert applied == [get_stylesheet("Vienna")]
+    toolbar.deleteLater()
+
+
+def test_default_styles_materialize_on_first_use(qapp):
+    register_default_styles()
+    styles = _Styles()
+    assert styles._materialized == {}
+    snapshot = styles.get_snapshot("Threshold")
+    assert list(styles._materialized) == ["Threshold"]
+    assert styles.get_snapshot("Threshold") is snapshot
+
+
+def test_sync_palette_without_palettechanged_signal(qapp, monkeypatch):
+    monkeypatch.setattr(toolbarstyles, "_HAS_PALETTECHANGED", False)
+    register_default_styles()
+    styles = _Styles()
+    snapshot = styles.get_snapshot("Kool")
+    changes = []
+    styles.notifier.StylesChanged.connect(changes.append)
+    original = QPalette(qapp.palette())
+    palette = QPalette(original)
+    palette.setColor(QPalette.Highlight, QColor("#ff0000"))
+    qapp.setPalette(palette)
+    try:
+        assert changes == []
+        styles.sync_palette()
+        assert "Kool" in changes[0]
+        assert styles.get_snapshot("Kool") is not snapshot
+        styles.sync_palette()
+        assert len(changes) == 1
+    finally:
+        qapp.setPalette(original)
+
+
+def test_style_factory_runs_once_per_palette(qapp):
+    register_default_styles()
+    calls = []
+
+    def factory():
+        calls.append(True)
+        return create_style("Vienna")
+
+    register_style("Factory", factory)
+    try:
+        assert calls == []
+        snapshot = get_stylesnapshot("Factory")
+        assert snapshot.name == "Factory"
+        assert get_stylesheet("Factory") is get_stylesheet("Factory")
+        assert get_stylesnapshot("Factory") is snapshot
+        assert len(calls) == 1
+
+        palette = QPalette(qapp.palette())
+        palette.setColor(QPalette.Highlight, QColor("#ff0000"))
+        regenerate_styles(palette)
+        assert get_stylesnapshot("Factory") is not snapshot
+        assert len(calls) == 2
+    finally:
+        unregister_style("Factory")
+        regenerate_styles(None)
+
+
+def test_snapshot_is_read_only_and_evolves(qapp):
+    register_default_styles()
+    snapshot = get_stylesnapshot("Kool")
+    with pytest.raises(AttributeError):
+        snapshot.TabSpacing = 7
+    with pytest.raises(AttributeError):
+        snapshot.evolve(NoSuchProperty=1)
+
+    evolved = snapshot.evolve(TabSpacing=7)
+    assert evolved.TabSpacing == 7 and snapshot.TabSpacing != 7
+    assert evolved.PaneColor is snapshot.PaneColor
+    assert evolved != snapshot
+    assert evolved.evolve(TabSpacing=snapshot.TabSpacing) == snapshot
+    assert get_stylesnapshot("Kool") is snapshot
+
+    params = snapshot.to_params()
+    params.TabSpacing = 7
+    assert snapshot.TabSpacing != 7
+
+
+def test_kool_frame_alpha_does_not_leak_into_pane(qapp):
+    register_default_styles()
+    snapshot = get_stylesnapshot("Kool")
+    assert snapshot.HorizontalFrameBackgroundColor().alpha() == 100
+    assert snapshot.PaneColor[0].value.alpha() == 255
+    assert (
+        snapshot.PaneColor[0].rgba & 0xFFFFFF
+        == snapshot.HorizontalFrameBackgroundColor[0].rgba & 0xFFFFFF
+    )
+
+
+def test_regenerate_styles_derives_and_notifies_once(qapp, monkeypatch):
+    register_default_styles()
+    snapshot = get_stylesnapshot("Kool")
+    derivations = []
+    derive_values = toolbarstyles.derive_values
+
+    def counting_derive(themes, *args):
+        derivations.append(set(themes))
+        return derive_values(themes, *args)
+
+    monkeypatch.setattr(toolbarstyles, "derive_values", counting_derive)
+    changes = []
+    get_stylenotifier().StylesChanged.connect(changes.append)
+    palette = QPalette(qapp.palette())
+    palette.setColor(QPalette.Highlight, QColor("#ff0000"))
+    try:
+        snapshots = regenerate_styles(palette)
+        assert derivations == [set(get_styles())]
+        assert len(changes) == 1
+        assert changes[0]["Kool"] <= _KOOL_RULES.dependents({"highlight"})
+        assert get_stylesnapshot("Kool") is snapshots["Kool"] is not snapshot
+
+        # Nothing changed, the materialized snapshots are kept.
+        assert regenerate_styles(palette)["Kool"] is snapshots["Kool"]
+        assert len(changes) == 1
+    finally:
+        get_stylenotifier().StylesChanged.disconnect(changes.append)
+        regenerate_styles(None)
+
+
+def test_palette_change_rederives_dependent_properties(qapp):
+    dependents = _KOOL_RULES.dependents({"highlight"})
+    assert "TabSpecialColor" in dependents
+    assert "TabFontColor" not in dependents
+
+    register_default_styles()
+    snapshot = get_stylesnapshot("Kool")
+    changes = []
+    get_stylenotifier().StylesChanged.connect(changes.append)
+    original = QPalette(qapp.palette())
+    palette = QPalette(original)
+    palette.setColor(QPalette.Highlight, QColor("#ff0000"))
+    qapp.setPalette(palette)
+    try:
+        assert changes[0]["Kool"] <= dependents
+        assert "TabSpecialColor" in changes[0]["Kool"]
+        kool = get_stylesnapshot("Kool")
+        assert kool.TabFontColor is snapshot.TabFontColor
+    finally:
+        get_stylenotifier().StylesChanged.disconnect(changes.append)
+        qapp.setPalette(original)
+
+
+def test_disk_cache_prunes_least_recently_used(tmp_path):
+    cache = _DiskCache(str(tmp_path), maxsize=2)
+    for mtime, key in enumerate(["a", "b"]):
+        cache.put(key, key * 3)
+        os.utime(tmp_path / (key + ".qss"), (mtime, mtime))
+    assert cache.get("a") == "aaa"
+
+    cache.put("c", "ccc")
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a.qss", "c.qss"]
+    assert cache.get("b") is None
+
+
+def test_disk_cache_writes_atomically(tmp_path, monkeypatch):
+    cache = _DiskCache(str(tmp_path))
+    cache.put("a", "old")
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    # A failed write keeps the previous sheet and leaves no temporary file.
+    monkeypatch.setattr(toolbarstyles.os, "replace", fail)
+    cache.put("a", "new")
+    assert cache.get("a") == "old"
+    assert [path.name for path in tmp_path.iterdir()] == ["a.qss"]
@@ -0,0 +1,162 @@
+from PyQt5 import QtCore
+from PyQt5.QtGui import QColor, QPalette
+from PyQt5.QtWidgets import QAction, QApplication, QMainWindow, QToolButton
+
+from pytabtoolbar import (
+    RestyleStats,
+    TabToolbar,
+    ToolbarMetric,
+    regenerate_styles,
+    register_style,
+)
+from pytabtoolbar.style import get_scopedsheet, get_stylesheet, get_stylesnapshot
+from pytabtoolbar.style.toolbarstyles import Colors, unregister_style
+
+
+def test_set_tabsvisible_moves_current_tab(qapp):
+    window = QMainWindow()
+    toolbar = TabToolbar(window)
+    window.addToolBar(toolbar)
+    pages = [toolbar.add_page("Page %d" % page_id) for page_id in range(3)]
+    toolbar.set_specialtabenabled(True)
+    toolbar.set_currenttab(toolbar.page_position(2))
+    toolbar.hide_tab(1)
+    assert toolbar.page_position(1) == -1
+    changes = []
+    toolbar.tabBar.currentChanged.connect(changes.append)
+
+    # Hiding the current tab must not leave the special tab current.
+    toolbar.set_tabsvisible({2: False, 1: True})
+    assert toolbar.page_position(2) == -1
+    assert toolbar.tabBar.currentWidget() is pages[1]
+    assert changes == [toolbar.current_tab]
+
+    toolbar.show_tab(2)
+    positions = [toolbar.page_position(page_id) for page_id in range(3)]
+    assert positions == sorted(positions)
+    assert toolbar.tabBar.currentWidget() is pages[1]
+    window.deleteLater()
+
+
+def test_incremental_restyle_falls_back_to_full(qapp, monkeypatch):
+    toolbar = TabToolbar(defaultstyle="Kool")
+    toolbar.set_incrementalrestyle(True)
+    kool = get_stylesnapshot("Kool")
+    register_style("Spaced", kool.evolve(TabSpacing=kool.TabSpacing + 4))
+    register_style("Paned", kool.evolve(PaneColor=Colors(QColor("#123456"))))
+    applied = []
+    monkeypatch.setattr(toolbar, "setStyleSheet", applied.append)
+    try:
+        # Only tab rules use TabSpacing, they are applied to the tab bar.
+        toolbar.set_style("Spaced")
+        assert applied == []
+        tabs = toolbar.tabBar.tabBar()
+        assert tabs.styleSheet() == get_scopedsheet(toolbar._style, "TTTab")
+
+        # The pages contain other scoped widgets, restyle the whole toolbar.
+        toolbar.set_style("Paned")
+        assert applied == [get_stylesheet("Paned")]
+        assert tabs.styleSheet() == ""
+    finally:
+        unregister_style("Spaced")
+        unregister_style("Paned")
+        toolbar.deleteLater()
+
+
+def test_restyle_requests_are_coalesced(qapp):
+    toolbar = TabToolbar(defaultstyle="Kool")
+    # Polishing the stylesheet changes the palette and requests a restyle.
+    toolbar.ensurePolished()
+    toolbar.reset_restylestats()
+    applied = []
+    toolbar.StyleChanged.connect(lambda: applied.append(True))
+    palette = QPalette(qapp.palette())
+    palette.setColor(QPalette.Highlight, QColor("#ff0000"))
+    try:
+        for _ in range(3):
+            QApplication.sendEvent(toolbar, QtCore.QEvent(QtCore.QEvent.StyleChange))
+        regenerate_styles(palette)
+        assert toolbar.restyle_stats() == RestyleStats(4, 0)
+        assert applied == []
+
+        QApplication.processEvents()
+        assert toolbar.restyle_stats() == RestyleStats(4, 1)
+        assert applied == [True]
+        assert toolbar._style is get_stylesnapshot("Kool")
+    finally:
+        regenerate_styles(None)
+        toolbar.deleteLater()
+
+
+def test_toolbutton_style_follows_application_style(qapp):
+    toolbar = TabToolbar(defaultstyle="Kool")
+    # Widgets with a stylesheet report a wrapper instead of their own style.
+    toolbar.setStyleSheet("")
+    group = toolbar.add_page("Home").add_group("Group")
+    group.add_action(QToolButton.InstantPopup, QAction("Action", toolbar), None)
+    button = group.findChild(QToolButton)
+    shared = toolbar.toolbutton_style()
+    assert toolbar.toolbutton_style() is shared
+    assert button.style() is shared
+
+    original = qapp.style().objectName()
+    QApplication.setStyle("Windows" if original.lower() != "windows" else "Fusion")
+    try:
+        # Rebuilt even if the new style were allocated at the old address.
+        assert toolbar._toolbutton_style_base is None
+        replaced = toolbar.toolbutton_style()
+        assert replaced is not shared
+        assert button.style() is replaced
+        assert toolbar.toolbutton_style() is replaced
+    finally:
+        QApplication.setStyle(original)
+        toolbar.deleteLater()
+
+
+def test_nested_batch_updates_apply_once(qapp):
+    toolbar = TabToolbar(defaultstyle="Kool")
+    applied = []
+    toolbar.StyleChanged.connect(lambda: applied.append(toolbar.get_style()))
+    heights = []
+    toolbar.HeightChanged.connect(heights.append)
+    with toolbar.batch_update():
+        with toolbar.batch_update():
+            toolbar.set_style("Vienna")
+            toolbar.add_page("Home")
+        assert applied == [] and heights == []
+        assert not toolbar.updatesEnabled()
+        toolbar.set_style("Threshold")
+    assert applied == ["Threshold"]
+    assert heights == [toolbar.maxheight]
+    assert toolbar.updatesEnabled() and toolbar.layout().isEnabled()
+
+    # An exception ends the batch as well.
+    try:
+        with toolbar.batch_update():
+            raise ValueError()
+    except ValueError:
+        pass
+    assert toolbar.updatesEnabled()
+    toolbar.deleteLater()
+
+
+def test_heightchanged_is_emitted_when_the_height_changes(qapp):
+    toolbar = TabToolbar(defaultstyle="Kool")
+    group = toolbar.add_page("Home").add_group("Group")
+    height = toolbar.maxheight
+    heights = []
+    toolbar.HeightChanged.connect(heights.append)
+    toolbar.update_height()
+    toolbar.set_style("Kool")
+    assert heights == []
+
+    group_height = toolbar.group_maxheight
+    toolbar.set_metric(ToolbarMetric.GroupHeight, group_height + 10)
+    assert heights == [height + 10]
+    assert toolbar.maximumHeight() == toolbar.minimumHeight() == height + 10
+    assert group.maximumHeight() == toolbar.group_height()
+    toolbar.set_metric(ToolbarMetric.GroupHeight, group_height + 10)
+    assert heights == [height + 10]
+    toolbar.set_metric(ToolbarMetric.GroupHeight, group_height)
+    assert heights == [height + 10, height]
+    toolbar.deleteLater()
@@ -0,0 +1,37 @@
+from PyQt5 import QtCore
+from PyQt5.QtGui import QColor, QIcon, QPixmap
+
+from pytabtoolbar.style import PixmapCacheStats
+from pytabtoolbar.style.toolbuttonstyle import _PixmapCache
+
+
+def _icon(color: str) -> QIcon:
+    pixmap = QPixmap(32, 32)
+    pixmap.fill(QColor(color))
+    return QIcon(pixmap)
+
+
+def test_pixmap_cache_evicts_least_recently_used(qapp):
+    size = QtCore.QSize(32, 32)
+    red, green, blue = _icon("red"), _icon("green"), _icon("blue")
+    nbytes = red.pixmap(size).depth() * 32 * 32 // 8
+    cache = _PixmapCache(limit=2 * nbytes)
+
+    def render(icon: QIcon) -> QPixmap:
+        return cache.pixmap(icon, size, QIcon.Normal, QIcon.Off)
+
+    first = render(red)
+    render(green)
+    assert render(red) is first
+    render(blue)
+    assert cache.stats() == PixmapCacheStats(1, 3, 2, 2 * nbytes, 2 * nbytes)
+    # Green was used least recently and had to make room for blue.
+    assert render(red) is first
+    render(green)
+    assert cache.stats().misses == 4
+
+    cache.set_limit(nbytes)
+    assert cache.stats().entries == 1
+    cache.set_limit(nbytes - 1)
+    assert render(red) is not render(red)
+    assert cache.stats() == PixmapCacheStats(2, 6, 0, 0, nbytes - 1)